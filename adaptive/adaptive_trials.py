@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Adaptive trial count for finetune Jobs generated with --adaptive.
+
+    python adaptive_trials.py finetune_cls/ finetune_flatten/ [--vol-root /mnt/j-jepa-vol]
+                              [--kubectl] [--apply] [--out-dir adaptive_jobs]
+
+An adaptive Job starts with --min-trials indices. Its jjepa/adaptive-*
+annotations name the result cells it writes, the metric and checkpoint type,
+the target 95% confidence-interval width and the maximum trial count. Per cell,
+this reads the per-trial values from the test_summary_<checkpoint>.json the
+test-all jobs write and computes the t-interval of the mean. If some cell is
+still wider than the target and fewer than max trials were launched, it writes
+a follow-up Job <job>-t<N>: a copy of the Job with TRIAL_OFFSET=N, so its pods
+run trial indices N, N+1, ... The count is the smallest n at which the widest
+cell's current std would meet the target, capped at the maximum.
+
+A round is only judged once every launched trial has a result. Without
+--kubectl that means len(trials) == trials launched. With --kubectl, once the
+last round's Job has finished and the summary was written after it, the
+trials that have results are enough (failed indices are not waited for). A
+Job kubectl no longer lists (TTL cleanup, deleted) counts as finished at the
+time its round was launched. Rerun
+the size's test-all Job after each round; ckpt_dedupe skips the cells that did
+not change.
+
+Default is a dry run that writes the follow-up manifests and changes nothing.
+--apply also runs kubectl apply on them and records the state in
+<cell>/adaptive_trials.json: trials launched, trials with results, mean / std,
+interval width, rounds and the stop reason ("ci-width" or "max-trials"). The
+summary jobs (summary_cls.yml, summary_flatten.yml) print those last two.
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+NAMESPACE = "cms-ml"
+STATE_NAME = "adaptive_trials.json"
+# two-sided 95% Student t quantiles for 1..30 degrees of freedom; 1.96 beyond
+T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+       2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+       2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t95(df):
+    return T95[df - 1] if df <= len(T95) else 1.96
+
+
+def ci_width(std, n):
+    """
+    Full width of the 95% t-interval of the mean of n trials.
+    """
+    return 2 * t95(n - 1) * std / math.sqrt(n) if n >= 2 else float("inf")
+
+
+def trials_needed(std, target, max_trials):
+    return next((n for n in range(2, max_trials + 1) if ci_width(std, n) <= target), max_trials)
+
+
+def load_adaptive_jobs(paths):
+    jobs = {}
+    for root in paths:
+        files = sorted(root.rglob("*.yaml")) if root.is_dir() else [root]
+        for f in files:
+            for doc in yaml.safe_load_all(f.read_text()):
+                if not doc or doc.get("kind") != "Job":
+                    continue
+                ann = doc["metadata"].get("annotations") or {}
+                # follow-up Jobs written by this script carry jjepa/adaptive-offset
+                if "jjepa/adaptive-max-trials" not in ann or "jjepa/adaptive-offset" in ann:
+                    continue
+                name = doc["metadata"]["name"]
+                if name in jobs:
+                    print(f"warning: {name} defined twice; keeping {jobs[name]['file']}", file=sys.stderr)
+                    continue
+                jobs[name] = {
+                    "name": name,
+                    "file": f,
+                    "doc": doc,
+                    "min_trials": int(doc["spec"]["completions"]),
+                    "max_trials": int(ann["jjepa/adaptive-max-trials"]),
+                    "ci_width": float(ann["jjepa/adaptive-ci-width"]),
+                    "metric": ann["jjepa/adaptive-metric"],
+                    "checkpoint": ann["jjepa/adaptive-checkpoint"],
+                    "cells": [c for c in ann["jjepa/adaptive-cells"].split(",") if c],
+                }
+    return jobs
+
+
+def local_path(path, vol_root):
+    return vol_root + path[len("/j-jepa-vol"):] if path.startswith("/j-jepa-vol/") else path
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _finite(x):
+    return round(x, 6) if isinstance(x, float) and math.isfinite(x) else (None if isinstance(x, float) else x)
+
+
+def write_json(path, data):
+    data = {k: _finite(v) for k, v in data.items()}
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def trial_values(summary, metric):
+    values = []
+    for trial in (summary or {}).get("trials", []):
+        v = trial.get(metric) if isinstance(trial, dict) else trial
+        if isinstance(v, (int, float)) and v == v:
+            values.append(float(v))
+    return values
+
+
+def kubectl_jobs(namespace):
+    out = subprocess.run(["kubectl", "-n", namespace, "get", "jobs", "-o", "json"],
+                         check=True, capture_output=True, text=True).stdout
+    return {item["metadata"]["name"]: item for item in json.loads(out)["items"]}
+
+
+def _epoch(stamp):
+    return datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def finished_at(item):
+    """
+    Epoch seconds when the Job reached Complete / Failed, or None while it runs.
+    """
+    for cond in (item or {}).get("status", {}).get("conditions") or []:
+        if cond["type"] in ("Complete", "Failed") and cond["status"] == "True":
+            return _epoch(cond.get("lastTransitionTime") or item["status"].get("completionTime"))
+    return None
+
+
+def round_finished_at(rnd, k8s):
+    """
+    finished_at for a round's Job. A Job missing from the listing has already
+    finished and been cleaned up; the round's launch time (0 for the first
+    round) stands in, so summaries written since then count.
+    """
+    if k8s is None:
+        return None
+    if rnd["job"] not in k8s:
+        return _epoch(rnd["launched_at"]) if rnd.get("launched_at") else 0.0
+    return finished_at(k8s[rnd["job"]])
+
+
+def follow_up(doc, offset, trials):
+    """
+    Copy of the adaptive Job that runs trial indices offset .. offset+trials-1.
+    """
+    doc = copy.deepcopy(doc)
+    meta = doc["metadata"]
+    meta["name"] = f"{meta['name']}-t{offset}"
+    meta["annotations"]["jjepa/adaptive-offset"] = str(offset)
+    doc["spec"]["completions"] = trials
+    doc["spec"]["parallelism"] = trials
+    for c in doc["spec"]["template"]["spec"]["containers"]:
+        for env in c.get("env", []):
+            if env["name"] == "TRIAL_OFFSET":
+                env["value"] = str(offset)
+    return doc
+
+
+class _BlockDumper(yaml.SafeDumper):
+    pass
+
+
+_BlockDumper.add_representer(
+    str, lambda d, s: d.represent_scalar("tag:yaml.org,2002:str", s, style="|" if "\n" in s else None))
+
+
+def decide(job, vol_root, k8s):
+    """
+    Returns (state per cell, decision, extra trials to launch).
+    """
+    cells = [local_path(c, vol_root) for c in job["cells"]]
+    states = [load_json(os.path.join(c, STATE_NAME)) or {} for c in cells]
+    launched = max([s.get("trials_launched", job["min_trials"]) for s in states])
+    rounds = max((s.get("rounds") for s in states if s.get("rounds")), key=len,
+                 default=[{"job": job["name"], "offset": 0, "trials": job["min_trials"], "launched_at": None}])
+    stop = next((s["stop_reason"] for s in states if s.get("stop_reason")), None)
+
+    new_states = []
+    settled = True
+    summary_name = f"test_summary_{job['checkpoint']}.json"
+    last_done = round_finished_at(rounds[-1], k8s)
+    for cell, pvc_cell in zip(cells, job["cells"]):
+        summary_path = os.path.join(cell, summary_name)
+        values = trial_values(load_json(summary_path), job["metric"])
+        n = len(values)
+        std = statistics.stdev(values) if n >= 2 else float("nan")
+        if n < launched:
+            # failed indices never report; accept the results once they are newer than the last round
+            settled = settled and n > 0 and last_done is not None and os.path.getmtime(summary_path) > last_done
+        new_states.append({
+            "cell": pvc_cell,
+            "trials_run": n,
+            "mean": statistics.fmean(values) if n else float("nan"),
+            "std": std,
+            "ci_width_now": ci_width(std, n) if n >= 2 else float("inf"),
+        })
+
+    extra = 0
+    if stop is not None:
+        decision = stop
+    elif not settled:
+        decision = "waiting"
+    elif all(s["ci_width_now"] <= job["ci_width"] for s in new_states):
+        decision = stop = "ci-width"
+    elif launched >= job["max_trials"]:
+        decision = stop = "max-trials"
+    else:
+        need = max(trials_needed(s["std"], job["ci_width"], job["max_trials"]) if s["trials_run"] >= 2
+                   else job["max_trials"] for s in new_states)
+        extra = min(job["max_trials"], max(need, launched + 1)) - launched
+        decision = f"launch {extra}"
+
+    for s in new_states:
+        s.update({
+            "job": job["name"],
+            "metric": job["metric"],
+            "checkpoint": job["checkpoint"],
+            "min_trials": job["min_trials"],
+            "max_trials": job["max_trials"],
+            "ci_width": job["ci_width"],
+            "trials_launched": launched,
+            "rounds": rounds,
+            "stop_reason": stop,
+        })
+    return new_states, decision, extra
+
+
+def print_rows(rows):
+    if not rows:
+        print("No --adaptive Jobs found.")
+        return
+    cols = list(rows[0])
+    col_widths = {c: max(len(c), max(len(str(r[c])) for r in rows)) for c in cols}
+    print(" | ".join(f"{c:{col_widths[c]}}" for c in cols))
+    print("-+-".join("-" * col_widths[c] for c in cols))
+    for r in rows:
+        print(" | ".join(f"{str(r[c]):{col_widths[c]}}" for c in cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="generator output directories or YAML files")
+    parser.add_argument("--vol-root", default="/j-jepa-vol", help="where the j-jepa-vol PVC is mounted here")
+    parser.add_argument("--kubectl", action="store_true",
+                        help="look up the last round's Job so results with failed indices can be judged")
+    parser.add_argument("--namespace", default=NAMESPACE)
+    parser.add_argument("--out-dir", type=Path, default=Path("adaptive_jobs"), help="where follow-up Jobs are written")
+    parser.add_argument("--apply", action="store_true", help="kubectl apply follow-up Jobs and record the state")
+    args = parser.parse_args()
+
+    jobs = load_adaptive_jobs(args.paths)
+    k8s = kubectl_jobs(args.namespace) if args.kubectl else None
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    rows = []
+    retest = set()
+    for name, job in jobs.items():
+        states, decision, extra = decide(job, args.vol_root, k8s)
+        launched = states[0]["trials_launched"]
+        if extra:
+            doc = follow_up(job["doc"], launched, extra)
+            args.out_dir.mkdir(parents=True, exist_ok=True)
+            fname = args.out_dir / f"{doc['metadata']['name']}.yaml"
+            fname.write_text(yaml.dump(doc, Dumper=_BlockDumper, sort_keys=False))
+            if args.apply:
+                subprocess.run(["kubectl", "apply", "-f", str(fname)], check=True)
+                for s in states:
+                    s["trials_launched"] = launched + extra
+                    s["rounds"] = s["rounds"] + [{"job": doc["metadata"]["name"], "offset": launched,
+                                                  "trials": extra, "launched_at": now}]
+            decision = f"{decision} -> {fname}"
+            for cell in job["cells"]:
+                parts = cell.split("/model_performances_run2/")[-1].split("/")
+                retest.add(f"alan-ptcl-{parts[0]}-{parts[1]}-jets-test-all")
+        if args.apply:
+            for s in states:
+                s["updated_at"] = now
+                write_json(os.path.join(local_path(s["cell"], args.vol_root), STATE_NAME), s)
+        for s in states:
+            rows.append({
+                "job": name,
+                "cell": s["cell"].split("/model_performances_run2/")[-1],
+                "launched": launched,
+                "run": s["trials_run"],
+                "mean": round(s["mean"], 4) if s["trials_run"] else "-",
+                "ci_width": round(s["ci_width_now"], 4) if s["trials_run"] >= 2 else "-",
+                "target": job["ci_width"],
+                "decision": decision,
+            })
+    print_rows(rows)
+    if retest:
+        print("\nOnce the follow-up Jobs finish, rerun: " + ", ".join(sorted(retest)))
+    if not args.apply and any(r["decision"].startswith("launch") for r in rows):
+        print("\nDry run: nothing applied, no state written (use --apply).")
+
+
+if __name__ == "__main__":
+    main()
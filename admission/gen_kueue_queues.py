@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Kueue objects for quota-aware admission of the sweep (--queue in the job
+generators).
+
+    python gen_kueue_queues.py [--gpu-quota 10] [--a100-quota 4] [--strategy StrictFIFO]
+
+Writes jjepa-kueue.yaml with one ResourceFlavor, a ClusterQueue holding the
+sweep's quota and a LocalQueue in cms-ml. Jobs generated with --queue are
+created suspended; Kueue unsuspends a Job only when the requests of all of its
+pods (every index of an Indexed Job, both GPUs of a 2-GPU pod) fit in the
+unused quota, so the scheduler only ever sees pods that can all run. Partial
+admission is never enabled (no kueue.x-k8s.io/job-min-parallelism). Within the
+queue, Jobs are ordered by their pod priorityClassName (--priority), then by
+creation time. StrictFIFO keeps a large Job at the head from being overtaken by
+smaller ones; BestEffortFIFO lets smaller Jobs through.
+
+ResourceFlavor and ClusterQueue are cluster-scoped and need an admin to apply.
+Admission reserves quota, not nodes; if a 2-GPU pod is admitted but no single
+node has two free GPUs, it still waits in the scheduler. Kueue's
+waitForPodsReady option (kueue-manager-config in kueue-system) requeues such
+Jobs after a timeout. admission/simulate_admission.py compares both behaviours
+against plain pod-level placement.
+"""
+import argparse
+from pathlib import Path
+
+NAMESPACE = "cms-ml"
+FLAVOR = "jjepa-default"
+CLUSTER_QUEUE = "jjepa-cluster-queue"
+LOCAL_QUEUE = "jjepa-queue"        # must match LOCAL_QUEUE in the job generators
+
+
+def emit_kueue_yaml(gpu_quota: int, a100_quota: int, cpu_quota: int, memory_gi: int,
+                    ephemeral_gi: int, strategy: str) -> str:
+    """
+    Build the ResourceFlavor, ClusterQueue and LocalQueue documents. Every
+    resource the jobs request must be covered, or Kueue never admits them.
+    The flavor has no node labels, so it does not change where pods land.
+    preemption stays Never, like the PriorityClasses.
+    """
+    yaml = f"""apiVersion: kueue.x-k8s.io/v1beta1
+kind: ResourceFlavor
+metadata:
+  name: {FLAVOR}
+  labels: {{ jobgroup: jjepa-job }}
+---
+apiVersion: kueue.x-k8s.io/v1beta1
+kind: ClusterQueue
+metadata:
+  name: {CLUSTER_QUEUE}
+  labels: {{ jobgroup: jjepa-job }}
+spec:
+  namespaceSelector:
+    matchLabels:
+      kubernetes.io/metadata.name: {NAMESPACE}
+  queueingStrategy: {strategy}
+  preemption:
+    reclaimWithinCohort: Never
+    withinClusterQueue: Never
+  resourceGroups:
+  - coveredResources: ["cpu", "memory", "ephemeral-storage", "nvidia.com/gpu", "nvidia.com/a100"]
+    flavors:
+    - name: {FLAVOR}
+      resources:
+      - {{ name: "cpu",               nominalQuota: {cpu_quota} }}
+      - {{ name: "memory",            nominalQuota: {memory_gi}Gi }}
+      - {{ name: "ephemeral-storage", nominalQuota: {ephemeral_gi}Gi }}
+      - {{ name: "nvidia.com/gpu",    nominalQuota: {gpu_quota} }}
+      - {{ name: "nvidia.com/a100",   nominalQuota: {a100_quota} }}
+---
+apiVersion: kueue.x-k8s.io/v1beta1
+kind: LocalQueue
+metadata:
+  name: {LOCAL_QUEUE}
+  namespace: {NAMESPACE}
+  labels: {{ jobgroup: jjepa-job }}
+spec:
+  clusterQueue: {CLUSTER_QUEUE}
+"""
+    return yaml
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    # a Job larger than the quota is never admitted: combined --gpus 2 needs 5 trials x 2 GPUs
+    parser.add_argument("--gpu-quota", type=int, default=10, help="nvidia.com/gpu (finetune / test jobs)")
+    parser.add_argument("--a100-quota", type=int, default=4, help="nvidia.com/a100 (pretraining jobs)")
+    parser.add_argument("--cpu-quota", type=int, default=96)
+    parser.add_argument("--memory-gi", type=int, default=1536)
+    parser.add_argument("--ephemeral-gi", type=int, default=512)
+    parser.add_argument("--strategy", choices=["StrictFIFO", "BestEffortFIFO"], default="StrictFIFO")
+    args = parser.parse_args()
+
+    fname = Path(".") / "jjepa-kueue.yaml"
+    fname.write_text(emit_kueue_yaml(args.gpu_quota, args.a100_quota, args.cpu_quota, args.memory_gi,
+                                     args.ephemeral_gi, args.strategy))
+
+    print("Wrote files:")
+    print("  -", fname)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Replay a sweep of generated Jobs on a small model cluster, with and without
+queue-based admission.
+
+    python simulate_admission.py training/ finetune_cls/ finetune_flatten/ test_condensed_cls/ ...
+                                 [--nodes 4x4,1x4:a100] [--gpu-quota 10 --a100-quota 4]
+                                 [--ignore-deps] [--json admission_sim.json]
+
+Pod requests, parallelism and priorityClassName come from the YAML; durations
+from jjepa/predicted-minutes (--priority), else --default-minutes. A Job is
+submitted when its jjepa/depends-on jobs have completed (as submit_sweep.sh
+does) or at t=0 with --ignore-deps (kubectl apply of the whole sweep). Three
+policies are compared:
+
+  pods         every pod is created at submission; each scheduling pass places
+               pending pods by (priority, submission) and skips the ones that
+               do not fit, like kube-scheduler without a queue
+  kueue-strict Jobs wait suspended and are admitted whole when all their pods
+               fit the remaining quota (gen_kueue_queues.py, StrictFIFO: the
+               head of the queue blocks the rest)
+  kueue-besteffort  the same with BestEffortFIFO: Jobs that fit may pass the head
+
+Reported per policy: makespan, mean / p90 job completion time from submission,
+mean wait until the first pod starts, worst wait of multi-GPU pods, GPU
+utilisation, pending-pod hours (how much the scheduler has to retry) and
+partial-placement GPU hours (GPUs held by Jobs whose other pods are still
+pending). Nodes are first-fit; there is no preemption, like the PriorityClasses.
+"""
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+import yaml
+
+GPU_RESOURCES = ("nvidia.com/gpu", "nvidia.com/a100")
+RESOURCES = ("cpu", "memory") + GPU_RESOURCES
+# must match scheduling/gen_priority_classes.py
+PRIORITY_VALUES = {"jjepa-quick": 400, "jjepa-short": 300, "jjepa-medium": 200, "jjepa-long": 100}
+POLICIES = ("pods", "kueue-strict", "kueue-besteffort")
+MEM_UNITS = {"Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40, "K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12}
+EPS = 1e-9
+
+
+def parse_quantity(name, value):
+    """
+    cpu in cores, memory in GiB, extended resources as counts.
+    """
+    s = str(value)
+    if name == "cpu":
+        return float(s[:-1]) / 1000 if s.endswith("m") else float(s)
+    if name == "memory":
+        for unit in sorted(MEM_UNITS, key=len, reverse=True):
+            if s.endswith(unit):
+                return float(s[:-len(unit)]) * MEM_UNITS[unit] / 2**30
+        return float(s) / 2**30
+    return float(s)
+
+
+def pod_request(pod_spec):
+    """
+    Effective pod request: the larger of the summed containers and any single
+    init container, per resource (the rule kube-scheduler and Kueue use).
+    """
+    def requests(c):
+        req = (c.get("resources") or {}).get("requests") or {}
+        return {r: parse_quantity(r, req[r]) for r in RESOURCES if r in req}
+
+    total = {r: 0.0 for r in RESOURCES}
+    for c in pod_spec.get("containers", []):
+        for r, v in requests(c).items():
+            total[r] += v
+    for c in pod_spec.get("initContainers", []) or []:
+        for r, v in requests(c).items():
+            total[r] = max(total[r], v)
+    return total
+
+
+def load_jobs(paths, default_minutes):
+    jobs = {}
+    missing_minutes = 0
+    for root in paths:
+        files = sorted(root.rglob("*.yaml")) if root.is_dir() else [root]
+        for f in files:
+            for doc in yaml.safe_load_all(f.read_text()):
+                if not doc or doc.get("kind") != "Job":
+                    continue
+                meta = doc["metadata"]
+                ann = meta.get("annotations") or {}
+                name = meta["name"]
+                if name in jobs:
+                    print(f"warning: {name} defined in {jobs[name]['file']} and {f}; keeping the first", file=sys.stderr)
+                    continue
+                spec = doc["spec"]
+                pod_spec = spec["template"]["spec"]
+                if "jjepa/predicted-minutes" in ann:
+                    minutes = float(ann["jjepa/predicted-minutes"])
+                else:
+                    minutes = default_minutes
+                    missing_minutes += 1
+                jobs[name] = {
+                    "name": name,
+                    "file": f,
+                    "order": len(jobs),
+                    "minutes": minutes,
+                    "pods": int(spec.get("parallelism", 1)),
+                    "request": pod_request(pod_spec),
+                    "priority": PRIORITY_VALUES.get(pod_spec.get("priorityClassName"), 0),
+                    "depends_on": [d for d in ann.get("jjepa/depends-on", "").split(",") if d],
+                    "provides": [p for p in ann.get("jjepa/provides", "").split(",") if p],
+                }
+    if missing_minutes:
+        print(f"warning: {missing_minutes} jobs have no jjepa/predicted-minutes (generate with --priority); "
+              f"using {default_minutes:g} min", file=sys.stderr)
+    # combined jobs stand in for the per-head jobs they list in jjepa/provides
+    aliases = {p: name for name, job in jobs.items() for p in job["provides"] if p not in jobs}
+    for job in jobs.values():
+        job["depends_on"] = sorted({aliases.get(d, d) for d in job["depends_on"]} & set(jobs))
+    return jobs
+
+
+def parse_nodes(spec, node_cpu, node_mem_gi):
+    """
+    "4x4,1x4:a100" -> four nodes with 4 nvidia.com/gpu and one with 4 nvidia.com/a100.
+    """
+    nodes = []
+    for part in spec.split(","):
+        shape, _, kind = part.strip().partition(":")
+        count, _, gpus = shape.partition("x")
+        resource = f"nvidia.com/{kind or 'gpu'}"
+        if resource not in GPU_RESOURCES:
+            raise SystemExit(f"unknown GPU type in --nodes: {part}")
+        for _ in range(int(count)):
+            free = {r: 0.0 for r in RESOURCES}
+            free.update({"cpu": float(node_cpu), "memory": float(node_mem_gi), resource: float(gpus)})
+            nodes.append(free)
+    return nodes
+
+
+def fits(request, free):
+    return all(request[r] <= free[r] + EPS for r in RESOURCES)
+
+
+def take(free, request, sign=1):
+    for r in RESOURCES:
+        free[r] -= sign * request[r]
+
+
+def simulate(jobs, nodes, quota, policy, ignore_deps):
+    """
+    Event-driven replay; returns per-job (submit, first start, finish) and the
+    integrated pending-pod, partial-placement and busy-GPU hours.
+    """
+    nodes = [dict(n) for n in nodes]
+    quota = dict(quota)
+    state = {name: {"submit": None, "start": None, "finish": None, "done_pods": 0, "running": 0,
+                    "pending": 0, "admitted": False} for name in jobs}
+    pending_pods = []      # (job name, pod index)
+    running = []           # (end time, job name, node index)
+    queue = []             # suspended jobs (kueue policies)
+    t = 0.0
+    acc = {"pending_pod_h": 0.0, "partial_gpu_h": 0.0, "busy_gpu_h": 0.0}
+
+    def gpus(job):
+        return sum(job["request"][r] for r in GPU_RESOURCES)
+
+    def key(name):
+        job = jobs[name]
+        return (-job["priority"], state[name]["submit"], job["order"])
+
+    def submit(name):
+        state[name]["submit"] = t
+        if policy == "pods":
+            create_pods(name)
+        else:
+            queue.append(name)
+
+    def create_pods(name):
+        state[name]["pending"] = jobs[name]["pods"]
+        pending_pods.extend((name, i) for i in range(jobs[name]["pods"]))
+
+    def admit():
+        for name in sorted(queue, key=key):
+            job = jobs[name]
+            total = {r: job["request"][r] * job["pods"] for r in RESOURCES}
+            if fits(total, quota):
+                take(quota, total)
+                queue.remove(name)
+                state[name]["admitted"] = True
+                create_pods(name)
+            elif policy == "kueue-strict":
+                break
+
+    def place():
+        for name, idx in sorted(pending_pods, key=lambda p: key(p[0]) + (p[1],)):
+            req = jobs[name]["request"]
+            node = next((i for i, free in enumerate(nodes) if fits(req, free)), None)
+            if node is None:
+                continue
+            take(nodes[node], req)
+            pending_pods.remove((name, idx))
+            running.append((t + jobs[name]["minutes"] / 60, name, node))
+            st = state[name]
+            st["pending"] -= 1
+            st["running"] += 1
+            if st["start"] is None:
+                st["start"] = t
+
+    for name, job in jobs.items():
+        if ignore_deps or not job["depends_on"]:
+            submit(name)
+
+    while True:
+        if policy != "pods":
+            admit()
+        place()
+        if not running:
+            break
+        t_next = min(r[0] for r in running)
+        dt = t_next - t
+        acc["pending_pod_h"] += len(pending_pods) * dt
+        acc["busy_gpu_h"] += sum(gpus(jobs[name]) for _, name, _ in running) * dt
+        acc["partial_gpu_h"] += sum(gpus(jobs[name]) for _, name, _ in running if state[name]["pending"]) * dt
+        t = t_next
+        finished_jobs = []
+        for entry in [r for r in running if r[0] <= t + EPS]:
+            running.remove(entry)
+            _, name, node = entry
+            req = jobs[name]["request"]
+            take(nodes[node], req, -1)
+            if policy != "pods":
+                take(quota, req, -1)
+            st = state[name]
+            st["running"] -= 1
+            st["done_pods"] += 1
+            if st["done_pods"] == jobs[name]["pods"]:
+                st["finish"] = t
+                finished_jobs.append(name)
+        if finished_jobs and not ignore_deps:
+            for name, job in jobs.items():
+                if state[name]["submit"] is None and all(state[d]["finish"] is not None for d in job["depends_on"]):
+                    submit(name)
+
+    stuck = sorted(name for name, st in state.items() if st["finish"] is None)
+    return state, acc, stuck
+
+
+def summarize(jobs, nodes, policy, state, acc, stuck):
+    done = [name for name, st in state.items() if st["finish"] is not None]
+    jct = sorted(state[n]["finish"] - state[n]["submit"] for n in done)
+    wait = [state[n]["start"] - state[n]["submit"] for n in done]
+    multi = [state[n]["start"] - state[n]["submit"] for n in done
+             if sum(jobs[n]["request"][r] for r in GPU_RESOURCES) > 1]
+    makespan = max((state[n]["finish"] for n in done), default=0.0)
+    capacity = sum(n[r] for n in nodes for r in GPU_RESOURCES)
+    return {
+        "policy": policy,
+        "jobs": len(done),
+        "stuck": len(stuck),
+        "makespan_h": round(makespan, 2),
+        "mean_jct_h": round(statistics.fmean(jct), 2) if jct else 0.0,
+        "p90_jct_h": round(jct[min(len(jct) - 1, int(0.9 * len(jct)))], 2) if jct else 0.0,
+        "mean_wait_h": round(statistics.fmean(wait), 2) if wait else 0.0,
+        "max_multi_gpu_wait_h": round(max(multi), 2) if multi else 0.0,
+        "gpu_util": round(acc["busy_gpu_h"] / (capacity * makespan), 3) if capacity and makespan else 0.0,
+        "pending_pod_h": round(acc["pending_pod_h"], 1),
+        "partial_gpu_h": round(acc["partial_gpu_h"], 1),
+    }
+
+
+def print_rows(rows):
+    cols = list(rows[0])
+    col_widths = {c: max(len(c), max(len(str(r[c])) for r in rows)) for c in cols}
+    print(" | ".join(f"{c:{col_widths[c]}}" for c in cols))
+    print("-+-".join("-" * col_widths[c] for c in cols))
+    for r in rows:
+        print(" | ".join(f"{str(r[c]):{col_widths[c]}}" for c in cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="generator output directories or YAML files")
+    parser.add_argument("--nodes", default="4x4,1x4:a100",
+                        help="GPU capacity available to the sweep: COUNTxGPUS[:gpu|a100], comma separated")
+    parser.add_argument("--node-cpu", type=float, default=32)
+    parser.add_argument("--node-mem-gi", type=float, default=512)
+    parser.add_argument("--gpu-quota", type=float, default=None, help="default: total nvidia.com/gpu in --nodes")
+    parser.add_argument("--a100-quota", type=float, default=None, help="default: total nvidia.com/a100 in --nodes")
+    parser.add_argument("--default-minutes", type=float, default=60)
+    parser.add_argument("--ignore-deps", action="store_true", help="submit every job at t=0")
+    parser.add_argument("--json", default=None, help="also write the table and per-job times as JSON")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.paths, args.default_minutes)
+    if not jobs:
+        raise SystemExit("No Job manifests found.")
+    nodes = parse_nodes(args.nodes, args.node_cpu, args.node_mem_gi)
+    # cpu / memory are not what the sweep is short of; only GPUs are quota-limited here
+    quota = {r: sum(n[r] for n in nodes) for r in RESOURCES}
+    if args.gpu_quota is not None:
+        quota["nvidia.com/gpu"] = args.gpu_quota
+    if args.a100_quota is not None:
+        quota["nvidia.com/a100"] = args.a100_quota
+
+    rows = []
+    per_job = {}
+    for policy in POLICIES:
+        state, acc, stuck = simulate(jobs, nodes, quota, policy, args.ignore_deps)
+        if stuck:
+            print(f"warning: {policy}: {len(stuck)} jobs never ran (larger than a node or the quota?): "
+                  f"{', '.join(stuck[:5])}{' ...' if len(stuck) > 5 else ''}", file=sys.stderr)
+        rows.append(summarize(jobs, nodes, policy, state, acc, stuck))
+        per_job[policy] = {n: {k: st[k] for k in ("submit", "start", "finish")} for n, st in state.items()}
+    print_rows(rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"nodes": args.nodes, "quota": quota, "rows": rows, "jobs": per_job}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
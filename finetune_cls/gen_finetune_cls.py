@@ -1,12 +1,28 @@
 #!/usr/bin/env python3
+import argparse
+import sys
+import textwrap
 from pathlib import Path
 from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "job_tools"))
+from jobgen import (ADAPTIVE_CI_WIDTH, ADAPTIVE_MAX_TRIALS, ADAPTIVE_MIN_TRIALS,  # noqa: E402
+                    adaptive_fields, priority_fields, timing_fields)
+
 IMAGE = "gitlab-registry.nrp-nautilus.io/jmduarte/hbb_interaction_network:latest"
 OPTION_FILE = "/config/ParT_B_amp_1p.json"
 TRAIN_DIR = "/j-jepa-vol/J-JEPA/data/top/train/"
 VAL_DIR   = "/j-jepa-vol/J-JEPA/data/top/val/"
 CONFIG_CM = "ptcl-options-amp-1p"
+JOB_TOOLS_CM = "jjepa-job-tools"   # built by job_tools/gen_job_tools_configmap.py
+PROFILE_STEPS = 50                 # DataLoader batches recorded in profile variants
+LOCAL_QUEUE = "jjepa-queue"        # --queue: Kueue LocalQueue from admission/gen_kueue_queues.py
+
+# Shortest-expected-job-first priorities (--priority): jobs are ranked by
+# predicted minutes / (1 + number of downstream jobs they unblock); tiers in job_tools/jobgen.py
+STARTUP_MIN = 5                    # clone + pip install before the first step
+N_EPOCH = 300
+FINETUNE_SEC_PER_KJET_EPOCH = 0.5  # rough finetune cost, calibrate from timing data
 
 SIZES = {
     "1k": 1_000,
@@ -18,12 +34,22 @@ SIZES = {
 PRETRAIN_PCTS = ["1", "5", "10", "50", "100"]  # percent values as strings
 
 
-def emit_job_yaml(size_key: str, num_samples: int, pct: Optional[str]) -> str:
+def emit_job_yaml(size_key: str, num_samples: int, pct: Optional[str], profile: Optional[str] = None,
+                  priority: bool = False, queue: Optional[str] = None,
+                  adaptive: Optional[tuple] = None) -> str:
     """
     Build a single Job YAML string.
     pct:
       - '1','5','10','50','100' for finetune jobs
       - None for baseline
+    profile:
+      - None for the normal 5-trial job
+      - 'torch', 'pyspy' or 'both' for a single bounded profiling trial
+    priority: attach a PriorityClass and scheduling annotations
+    queue: Kueue LocalQueue name; the Job is created suspended and admitted
+      only once its whole request (every pod) fits the queue's quota
+    adaptive: (min_trials, max_trials, ci_width) to start min_trials trials and
+      let adaptive/adaptive_trials.py add more (not with profile)
     """
     if pct is None:
         job_name = f"alan-ptcl-{size_key}-jets-cls-baseline"
@@ -45,23 +71,82 @@ def emit_job_yaml(size_key: str, num_samples: int, pct: Optional[str]) -> str:
         from_checkpoint_line = "            --from-checkpoint 0\n"
         label_line = ""
 
-    out_dir = f"/j-jepa-vol/J-JEPA-Alan/model_performances_run2/cls/{size_key}/{out_subdir}"
+    out_root = "/j-jepa-vol/J-JEPA-Alan/model_performances_run2/cls"
+    out_dir = f"{out_root}/{size_key}/{out_subdir}"
+
+    completions = 5
+    launch = "          phase train python -u -m src.evaluation.finetune_ptcl \\\n"
+    extra_mounts = ""
+    extra_volumes = ""
+    security = ""
+    if profile is not None:
+        # one bounded trial; outputs live under <root>/profile/ so the test
+        # loops and summary tables never pick the profiling run up as a trial
+        job_name = f"{job_name}-profile"
+        prof_dir = f"{out_root}/profile/{size_key}/{out_subdir}"
+        out_dir = f"{prof_dir}/run"
+        completions = 1
+        no_trace = " --no-trace" if profile == "pyspy" else ""
+        prof_cmd = (
+            f"python -u /job-tools/torch_profile.py --out-dir {prof_dir} --steps {PROFILE_STEPS}{no_trace} -- \\\n"
+            "            -m src.evaluation.finetune_ptcl \\\n"
+        )
+        launch = f"          phase train {prof_cmd}"
+        if profile in ("pyspy", "both"):
+            launch = (
+                "          phase pip-install-pyspy pip install --no-cache-dir py-spy\n"
+                f"          mkdir -p {prof_dir}\n"
+                "          phase train py-spy record --subprocesses --idle --rate 100 --format speedscope \\\n"
+                f"            -o {prof_dir}/pyspy_$POD_NAME.speedscope.json -- \\\n"
+                f"          {prof_cmd}"
+            )
+            security = '        securityContext: { capabilities: { add: ["SYS_PTRACE"] } }\n'
+        extra_mounts = "        - { name: job-tools,  mountPath: /job-tools, readOnly: true }\n"
+        extra_volumes = f"      - {{ name: job-tools, configMap: {{ name: {JOB_TOOLS_CM} }} }}\n"
+
+    annotations = ""
+    priority_class = ""
+    if priority:
+        # trials run in parallel, so the job takes about as long as one trial;
+        # it unblocks the test-all job of its size
+        if profile is None:
+            minutes = STARTUP_MIN + N_EPOCH * num_samples / 1000 * FINETUNE_SEC_PER_KJET_EPOCH / 60
+        else:
+            minutes = STARTUP_MIN + 10
+        depends_on = [] if pct is None else [f"alan-part-jjepa-{pct}p"]
+        annotations, priority_class = priority_fields("finetune", minutes, 1, depends_on)
+
+    queue_label = ""
+    suspend = ""
+    if queue is not None:
+        queue_label = f", kueue.x-k8s.io/queue-name: {queue}"
+        suspend = "  suspend: true\n"
+
+    init_pre, init_post, runner_pre = (textwrap.indent(s, " " * 10) for s in timing_fields("finetune", job_name))
+
+    adaptive_env = ""
+    if adaptive is not None:
+        min_trials, max_trials, ci_width = adaptive
+        completions = min_trials
+        adaptive_ann, adaptive_env, adaptive_pre = adaptive_fields([out_dir], max_trials, ci_width)
+        annotations = (annotations or "  annotations:\n") + adaptive_ann
+        runner_pre += textwrap.indent(adaptive_pre, " " * 10)
 
     yaml = f"""apiVersion: batch/v1
 kind: Job
 metadata:
   name: {job_name}
   namespace: cms-ml
-  labels: {{ jobgroup: jjepa-job }}
-spec:
-  completions: 5
-  parallelism: 5
+  labels: {{ jobgroup: jjepa-job{queue_label} }}
+{annotations}spec:
+{suspend}  completions: {completions}
+  parallelism: {completions}
   completionMode: Indexed
   backoffLimit: 5
   backoffLimitPerIndex: 3 
   template:
     spec:
-      restartPolicy: Never
+{priority_class}      restartPolicy: Never
       tolerations:
         - key: "nautilus.io/hardware"
           operator: "Equal"
@@ -81,12 +166,17 @@ spec:
       initContainers:
       - name: init-clone-repo
         image: alpine/git
+        env:
+        - name: POD_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
         command: ["/bin/sh","-c"]
         args:
         - |
-          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA &&
-          chown -R 1000:1000 /opt/repo
-        resources:
+{init_pre}          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA &&
+          chown -R 1000:1000 /opt/repo || rc=$?
+{init_post}        resources:
           requests: {{ cpu: "1", memory: 1Gi, ephemeral-storage: "1Gi" }}
           limits:   {{ cpu: "1", memory: 1Gi,  ephemeral-storage: "4Gi" }}
         volumeMounts:
@@ -99,48 +189,71 @@ spec:
         - {{ name: TORCH_CUDA_ALLOC_CONF, value: "max_split_size_mb:128" }}
         - name: POD_NAME
           valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
-        command: ["/bin/bash","-lc"]
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
+{adaptive_env}        command: ["/bin/bash","-lc"]
         args:
         - |
           set -euo pipefail
-          cd /opt/repo/J-JEPA
-          pip install -e .
+{runner_pre}          cd /opt/repo/J-JEPA
+          phase pip-install pip install -e .
 
-          python -u -m src.evaluation.finetune_ptcl \\
-            --option-file {OPTION_FILE} \\
+{launch}            --option-file {OPTION_FILE} \\
             --train-dataset-path {TRAIN_DIR} \\
             --val-dataset-path   {VAL_DIR} \\
             --out-dir {out_dir} \\
 {load_line}            --batch-size 128 --sum 0 --flatten 0 --cls 1 --finetune 1 \\
-            --n-epoch 300 --num-samples {num_samples} \\
-{from_checkpoint_line}{label_line}        resources:
+            --n-epoch {N_EPOCH} --num-samples {num_samples} \\
+{from_checkpoint_line}{label_line}{security}        resources:
           requests: {{ cpu: "4", memory: 64Gi, nvidia.com/gpu: 1, ephemeral-storage: "1Gi" }}
           limits:   {{ cpu: "4", memory: 64Gi, nvidia.com/gpu: 1, ephemeral-storage: "16Gi" }}
         volumeMounts:
         - {{ name: git-repo,   mountPath: /opt/repo }}
         - {{ name: j-jepa-vol, mountPath: /j-jepa-vol }}
         - {{ name: config,     mountPath: /config, readOnly: true }}
-      volumes:
+{extra_mounts}      volumes:
       - {{ name: git-repo, emptyDir: {{}} }}
       - {{ name: j-jepa-vol, persistentVolumeClaim: {{ claimName: j-jepa-vol }} }}
       - {{ name: config,   configMap: {{ name: {CONFIG_CM} }} }}
-"""
+{extra_volumes}"""
     return yaml
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate cls finetune Job YAMLs.")
+    parser.add_argument("--profile", choices=["torch", "pyspy", "both"], default=None,
+                        help="write bounded profiling variants instead of the full runs")
+    parser.add_argument("--priority", action="store_true",
+                        help="attach PriorityClasses / annotations for scheduling/plan_sweep.py")
+    parser.add_argument("--queue", nargs="?", const=LOCAL_QUEUE, default=None,
+                        help=f"submit through a Kueue LocalQueue (default {LOCAL_QUEUE}): created suspended, "
+                             "admitted when the whole job fits the quota")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="start --min-trials trials; adaptive/adaptive_trials.py adds more, up to --max-trials, "
+                             "until the 95%% CI of the test accuracy is narrower than --ci-width")
+    parser.add_argument("--min-trials", type=int, default=ADAPTIVE_MIN_TRIALS)
+    parser.add_argument("--max-trials", type=int, default=ADAPTIVE_MAX_TRIALS)
+    parser.add_argument("--ci-width", type=float, default=ADAPTIVE_CI_WIDTH)
+    args = parser.parse_args()
+    if args.adaptive and args.profile:
+        parser.error("--adaptive does not apply to --profile runs")
+    if args.adaptive and not 2 <= args.min_trials <= args.max_trials:
+        parser.error("--adaptive needs 2 <= --min-trials <= --max-trials")
+    adaptive = (args.min_trials, args.max_trials, args.ci_width) if args.adaptive else None
+
     out_dir = Path(".")
     written = []
+    suffix = "-profile" if args.profile else ""
 
     for size_key, num in SIZES.items():
         # five finetune jobs
         for pct in PRETRAIN_PCTS:
-            fname = out_dir / f"alan-ptcl-{size_key}-jets-finetune-{pct}p.yaml"
-            fname.write_text(emit_job_yaml(size_key, num, pct))
+            fname = out_dir / f"alan-ptcl-{size_key}-jets-finetune-{pct}p{suffix}.yaml"
+            fname.write_text(emit_job_yaml(size_key, num, pct, args.profile, args.priority, args.queue, adaptive))
             written.append(str(fname))
         # baseline
-        fname = out_dir / f"alan-ptcl-{size_key}-jets-baseline.yaml"
-        fname.write_text(emit_job_yaml(size_key, num, None))
+        fname = out_dir / f"alan-ptcl-{size_key}-jets-baseline{suffix}.yaml"
+        fname.write_text(emit_job_yaml(size_key, num, None, args.profile, args.priority, args.queue, adaptive))
         written.append(str(fname))
 
     print("Wrote files:")
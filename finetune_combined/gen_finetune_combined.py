@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import textwrap
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "job_tools"))
+from jobgen import (ADAPTIVE_CI_WIDTH, ADAPTIVE_MAX_TRIALS, ADAPTIVE_MIN_TRIALS,  # noqa: E402
+                    adaptive_fields, priority_fields, timing_fields)
+
+IMAGE = "gitlab-registry.nrp-nautilus.io/jmduarte/hbb_interaction_network:latest"
+OPTION_FILE = "/config/ParT_B_amp_1p.json"
+TRAIN_DIR = "/j-jepa-vol/J-JEPA/data/top/train/"
+VAL_DIR   = "/j-jepa-vol/J-JEPA/data/top/val/"
+CONFIG_CM = "ptcl-options-amp-1p"
+JOB_TOOLS_CM = "jjepa-job-tools"   # built by job_tools/gen_job_tools_configmap.py
+PROFILE_STEPS = 50                 # DataLoader batches recorded in profile variants
+OUT_BASE = "/j-jepa-vol/J-JEPA-Alan/model_performances_run2"   # cls/ and flatten/ trees as before
+LOCAL_QUEUE = "jjepa-queue"        # --queue: Kueue LocalQueue from admission/gen_kueue_queues.py
+
+# head name -> (--sum, --flatten, --cls) flags of src.evaluation.finetune_ptcl
+HEADS = {
+    "cls": (0, 0, 1),
+    "flatten": (0, 1, 0),
+}
+
+# Shortest-expected-job-first priorities (--priority): jobs are ranked by
+# predicted minutes / (1 + number of downstream jobs they unblock); tiers in job_tools/jobgen.py
+STARTUP_MIN = 5                    # clone + pip install before the first step
+N_EPOCH = 300
+FINETUNE_SEC_PER_KJET_EPOCH = 0.5  # rough finetune cost, calibrate from timing data
+SHARED_GPU_SLOWDOWN = 1.3          # two heads on one GPU vs one head alone, calibrate from timing data
+
+SIZES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+PRETRAIN_PCTS = ["1", "5", "10", "50", "100"]  # percent values as strings
+
+MARKER = ".trial_${JOB_UID}_${JOB_COMPLETION_INDEX}.done"   # per-head "trial finished", see head_wait
+
+
+def head_launch(head: str, gpu: Optional[int], out_dir: str, num_samples: int,
+                ckpt_path: Optional[str], profile: Optional[str] = None, prof_dir: Optional[str] = None) -> str:
+    """
+    Background launch of one head's finetune_ptcl run, output prefixed with
+    [head]; the pid is kept in <head>_pid for the final wait. Outside profile
+    runs, a head whose trial already finished in an earlier attempt of this
+    index of this Job (marker from head_wait) is not started again and
+    <head>_pid is empty.
+    With profile, the run goes through torch_profile.py and/or py-spy into prof_dir.
+    """
+    sum_, flatten, cls = HEADS[head]
+    env = "" if gpu is None else f"CUDA_VISIBLE_DEVICES={gpu} "
+    cmd = ["python -u -m src.evaluation.finetune_ptcl"]
+    if profile is not None:
+        no_trace = " --no-trace" if profile == "pyspy" else ""
+        cmd = [
+            f"python -u /job-tools/torch_profile.py --out-dir {prof_dir} --steps {PROFILE_STEPS}{no_trace} --",
+            "  -m src.evaluation.finetune_ptcl",
+        ]
+        if profile in ("pyspy", "both"):
+            cmd = [
+                "py-spy record --subprocesses --idle --rate 100 --format speedscope",
+                f"  -o {prof_dir}/pyspy_$POD_NAME.speedscope.json --",
+                "  " + cmd[0],
+                cmd[1],
+            ]
+    lines = [f"{env}phase train-{head} {cmd[0]}"] + cmd[1:] + [
+        f"  --option-file {OPTION_FILE}",
+        '  --train-dataset-path "$TRAIN_DIR"',
+        '  --val-dataset-path   "$VAL_DIR"',
+        f"  --out-dir {out_dir}",
+    ]
+    if ckpt_path is not None:
+        lines.append(f"  --load-jjepa-path {ckpt_path}")
+    lines += [
+        f"  --batch-size 128 --sum {sum_} --flatten {flatten} --cls {cls} --finetune 1",
+        f"  --n-epoch {N_EPOCH} --num-samples {num_samples}",
+        "  --from-checkpoint 0",
+    ]
+    if ckpt_path is None:
+        lines.append("  --label from_scratch")
+    lines.append(f"  > >(sed -u 's/^/[{head}] /') 2>&1 &")
+    launch = " \\\n".join(lines[:-1]) + " \\\n" + lines[-1] + f"\n{head}_pid=$!\n"
+    if profile is not None:
+        return launch
+    return (
+        f"{head}_pid=\n"
+        f'if [ -e "{out_dir}/{MARKER}" ]; then\n'
+        f'  echo "[{head}] trial $JOB_COMPLETION_INDEX already finished, not rerunning"\n'
+        "else\n"
+        + textwrap.indent(launch, "  ")
+        + "fi\n"
+    )
+
+
+def head_wait(head: str, out_dir: str, profile: Optional[str] = None) -> str:
+    """
+    Wait for one head; a successful trial leaves out_dir/.trial_<job uid>_<index>.done
+    so a retry of the pod only reruns the head that failed. The Job's uid keeps
+    markers on the volume from matching a later Job with the same name.
+    """
+    if profile is not None:
+        return f'wait "${head}_pid" || rc=$?\n'
+    return (
+        f'if [ -n "${head}_pid" ]; then\n'
+        f'  if wait "${head}_pid"; then\n'
+        f'    mkdir -p "{out_dir}" && touch "{out_dir}/{MARKER}"\n'
+        "  else\n"
+        "    rc=$?\n"
+        "  fi\n"
+        "fi\n"
+    )
+
+
+def emit_job_yaml(size_key: str, num_samples: int, pct: Optional[str], gpus: int = 1,
+                  stage_data: bool = False, priority: bool = False,
+                  queue: Optional[str] = None,
+                  adaptive: Optional[tuple] = None,
+                  profile: Optional[str] = None) -> str:
+    """
+    Build one Job that finetunes the cls and flatten heads side by side in the
+    same pod for every trial index, writing to the usual cls/ and flatten/
+    trees. Compared with gen_finetune_cls.py + gen_finetune_flatten.py this
+    halves the pods, clones and pip installs, and both runs read the dataset
+    through one node's page cache (or one /dev/shm copy with stage_data).
+    The two runs still each build their own DataLoader and backbone forward
+    pass; sharing those needs changes in src.evaluation.finetune_ptcl.
+    pct:
+      - '1','5','10','50','100' for finetune jobs
+      - None for baseline
+    gpus: 1 (heads share the GPU) or 2 (one GPU per head)
+    stage_data: copy the train/val shards to /dev/shm once before both runs
+    priority: attach a PriorityClass and scheduling annotations
+    queue: Kueue LocalQueue name; the Job is created suspended and admitted
+      only once its whole request (every pod) fits the queue's quota
+    adaptive: (min_trials, max_trials, ci_width) to start min_trials trials and
+      let adaptive/adaptive_trials.py add more; it waits for both heads' results
+      (not with profile)
+    profile:
+      - None for the normal 5-trial job
+      - 'torch', 'pyspy' or 'both' for a single bounded profiling trial of both
+        heads, under <head root>/profile/combined/ so it never mixes with the
+        per-head profiles or real trials
+    """
+    if pct is None:
+        job_name = f"alan-ptcl-{size_key}-jets-combined-baseline"
+        out_subdir = "baseline"
+        ckpt_path = None
+        per_head = [f"alan-ptcl-{size_key}-jets-{head}-baseline" for head in HEADS]
+    else:
+        pct_name = f"{pct}p"       # for k8s object name
+        pct_path = f"{pct}%"       # for filesystem paths
+        job_name = f"alan-ptcl-{size_key}-jets-finetune-combined-{pct_name}"
+        out_subdir = f"finetune/{pct_path}"
+        ckpt_dir = "/j-jepa-vol/J-JEPA-Alan/models/JetClass/ptcl_filtered"
+        ckpt_sub = "100%" if pct == "100" else pct_path
+        ckpt_path = f"{ckpt_dir}/{ckpt_sub}/best_model.pth"
+        per_head = [f"alan-ptcl-{size_key}-jets-finetune-{head}-{pct_name}" for head in HEADS]
+
+    out_dirs = {head: f"{OUT_BASE}/{head}/{size_key}/{out_subdir}" for head in HEADS}
+    prof_dirs = {head: None for head in HEADS}
+    completions = 5
+    prof_setup = ""
+    extra_mounts = ""
+    extra_volumes = ""
+    security = ""
+    if profile is not None:
+        # one bounded trial; outputs live under <root>/profile/ so the test
+        # loops and summary tables never pick the profiling run up as a trial
+        job_name = f"{job_name}-profile"
+        completions = 1
+        prof_dirs = {head: f"{OUT_BASE}/{head}/profile/combined/{size_key}/{out_subdir}" for head in HEADS}
+        out_dirs = {head: f"{prof_dirs[head]}/run" for head in HEADS}
+        if profile in ("pyspy", "both"):
+            prof_setup = "phase pip-install-pyspy pip install --no-cache-dir py-spy\n" + "".join(
+                f"mkdir -p {prof_dirs[head]}\n" for head in HEADS)
+            security = '        securityContext: { capabilities: { add: ["SYS_PTRACE"] } }\n'
+        extra_mounts = "        - { name: job-tools,  mountPath: /job-tools, readOnly: true }\n"
+        extra_volumes = f"      - {{ name: job-tools, configMap: {{ name: {JOB_TOOLS_CM} }} }}\n"
+
+    launches = "".join(
+        head_launch(head, None if gpus == 1 else i, out_dirs[head], num_samples, ckpt_path,
+                    profile, prof_dirs[head])
+        for i, head in enumerate(HEADS)
+    )
+    waits = "".join(head_wait(head, out_dirs[head], profile) for head in HEADS)
+
+    if stage_data:
+        data_setup = (
+            "TRAIN_DIR=/dev/shm/data/train/\n"
+            "VAL_DIR=/dev/shm/data/val/\n"
+            "mkdir -p /dev/shm/data\n"
+            f'phase stage-data cp -r {TRAIN_DIR} "$TRAIN_DIR"\n'
+            f'phase stage-data cp -r {VAL_DIR} "$VAL_DIR"\n'
+        )
+    else:
+        data_setup = f"TRAIN_DIR={TRAIN_DIR}\nVAL_DIR={VAL_DIR}\n"
+
+    annotations = ""
+    priority_class = ""
+    if priority:
+        # trials run in parallel; the two heads run concurrently in each pod
+        slowdown = SHARED_GPU_SLOWDOWN if gpus == 1 else 1.0
+        if profile is None:
+            minutes = STARTUP_MIN + slowdown * N_EPOCH * num_samples / 1000 * FINETUNE_SEC_PER_KJET_EPOCH / 60
+        else:
+            minutes = STARTUP_MIN + 10
+        depends_on = [] if pct is None else [f"alan-part-jjepa-{pct}p"]
+        annotations, priority_class = priority_fields("finetune", minutes, len(HEADS), depends_on, per_head)
+
+    queue_label = ""
+    suspend = ""
+    if queue is not None:
+        queue_label = f", kueue.x-k8s.io/queue-name: {queue}"
+        suspend = "  suspend: true\n"
+
+    init_pre, init_post, runner_pre = (textwrap.indent(s, " " * 10) for s in timing_fields("finetune", job_name))
+
+    adaptive_env = ""
+    if adaptive is not None:
+        min_trials, max_trials, ci_width = adaptive
+        completions = min_trials
+        cells = [out_dirs[head] for head in HEADS]
+        adaptive_ann, adaptive_env, adaptive_pre = adaptive_fields(cells, max_trials, ci_width)
+        annotations = (annotations or "  annotations:\n") + adaptive_ann
+        runner_pre += textwrap.indent(adaptive_pre, " " * 10)
+
+    body = textwrap.indent(data_setup + prof_setup + "\n" + launches + "\nrc=0\n" + waits + "exit $rc\n", " " * 10)
+    memory = 64 * len(HEADS)
+
+    yaml = f"""apiVersion: batch/v1
+kind: Job
+metadata:
+  name: {job_name}
+  namespace: cms-ml
+  labels: {{ jobgroup: jjepa-job{queue_label} }}
+{annotations}spec:
+{suspend}  completions: {completions}
+  parallelism: {completions}
+  completionMode: Indexed
+  backoffLimit: 5
+  backoffLimitPerIndex: 3
+  template:
+    spec:
+{priority_class}      restartPolicy: Never
+      tolerations:
+        - key: "nautilus.io/hardware"
+          operator: "Equal"
+          value: "gpu"
+          effect: "NoSchedule"
+      affinity:
+        nodeAffinity:
+          requiredDuringSchedulingIgnoredDuringExecution:
+            nodeSelectorTerms:
+            - matchExpressions:
+              - key: kubernetes.io/hostname
+                operator: NotIn
+                values:
+                  - ry-gpu-15.sdsc.optiputer.net
+                  - gpn-fiona-mizzou-7.rnet.missouri.edu
+                  - prp-gpu-3.t2.ucsd.edu
+      initContainers:
+      - name: init-clone-repo
+        image: alpine/git
+        env:
+        - name: POD_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
+        command: ["/bin/sh","-c"]
+        args:
+        - |
+{init_pre}          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA &&
+          chown -R 1000:1000 /opt/repo || rc=$?
+{init_post}        resources:
+          requests: {{ cpu: "1", memory: 1Gi, ephemeral-storage: "1Gi" }}
+          limits:   {{ cpu: "1", memory: 1Gi,  ephemeral-storage: "4Gi" }}
+        volumeMounts:
+        - {{ name: git-repo, mountPath: /opt/repo }}
+      containers:
+      - name: runner
+        image: {IMAGE}
+        env:
+        - {{ name: PYTHONPATH, value: "/opt/repo/J-JEPA" }}
+        - {{ name: TORCH_CUDA_ALLOC_CONF, value: "max_split_size_mb:128" }}
+        - name: POD_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
+        - name: JOB_UID
+          valueFrom: {{ fieldRef: {{ fieldPath: "metadata.labels['batch.kubernetes.io/controller-uid']" }} }}
+{adaptive_env}        command: ["/bin/bash","-lc"]
+        args:
+        - |
+          set -euo pipefail
+{runner_pre}          cd /opt/repo/J-JEPA
+          phase pip-install pip install -e .
+
+{body}{security}        resources:
+          requests: {{ cpu: "{4 * len(HEADS)}", memory: {memory}Gi, nvidia.com/gpu: {gpus}, ephemeral-storage: "1Gi" }}
+          limits:   {{ cpu: "{4 * len(HEADS)}", memory: {memory}Gi, nvidia.com/gpu: {gpus}, ephemeral-storage: "16Gi" }}
+        volumeMounts:
+        - {{ name: git-repo,   mountPath: /opt/repo }}
+        - {{ name: j-jepa-vol, mountPath: /j-jepa-vol }}
+        - {{ name: config,     mountPath: /config, readOnly: true }}
+        - {{ name: dshm,       mountPath: /dev/shm }}
+{extra_mounts}      volumes:
+      - {{ name: git-repo, emptyDir: {{}} }}
+      - {{ name: j-jepa-vol, persistentVolumeClaim: {{ claimName: j-jepa-vol }} }}
+      - {{ name: config,   configMap: {{ name: {CONFIG_CM} }} }}
+      - {{ name: dshm, emptyDir: {{ medium: Memory, sizeLimit: 32Gi }} }}
+{extra_volumes}"""
+    return yaml
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate combined cls + flatten finetune Job YAMLs.")
+    parser.add_argument("--profile", choices=["torch", "pyspy", "both"], default=None,
+                        help="write bounded profiling variants instead of the full runs")
+    parser.add_argument("--gpus", type=int, choices=[1, 2], default=1,
+                        help="GPUs per pod: 1 = heads share a GPU, 2 = one GPU per head")
+    parser.add_argument("--stage-data", action="store_true",
+                        help="copy the train/val shards to /dev/shm once and train both heads from there")
+    parser.add_argument("--priority", action="store_true",
+                        help="attach PriorityClasses / annotations for scheduling/plan_sweep.py")
+    parser.add_argument("--queue", nargs="?", const=LOCAL_QUEUE, default=None,
+                        help=f"submit through a Kueue LocalQueue (default {LOCAL_QUEUE}): created suspended, "
+                             "admitted when the whole job fits the quota")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="start --min-trials trials; adaptive/adaptive_trials.py adds more, up to --max-trials, "
+                             "until the 95%% CI of the test accuracy is narrower than --ci-width")
+    parser.add_argument("--min-trials", type=int, default=ADAPTIVE_MIN_TRIALS)
+    parser.add_argument("--max-trials", type=int, default=ADAPTIVE_MAX_TRIALS)
+    parser.add_argument("--ci-width", type=float, default=ADAPTIVE_CI_WIDTH)
+    args = parser.parse_args()
+    if args.adaptive and args.profile:
+        parser.error("--adaptive does not apply to --profile runs")
+    if args.adaptive and not 2 <= args.min_trials <= args.max_trials:
+        parser.error("--adaptive needs 2 <= --min-trials <= --max-trials")
+    adaptive = (args.min_trials, args.max_trials, args.ci_width) if args.adaptive else None
+
+    out_dir = Path(".")
+    written = []
+    suffix = "-profile" if args.profile else ""
+
+    for size_key, num in SIZES.items():
+        for pct in PRETRAIN_PCTS:
+            fname = out_dir / f"alan-ptcl-{size_key}-jets-finetune-combined-{pct}p{suffix}.yaml"
+            fname.write_text(emit_job_yaml(size_key, num, pct, args.gpus, args.stage_data, args.priority, args.queue,
+                                           adaptive, args.profile))
+            written.append(str(fname))
+        fname = out_dir / f"alan-ptcl-{size_key}-jets-combined-baseline{suffix}.yaml"
+        fname.write_text(emit_job_yaml(size_key, num, None, args.gpus, args.stage_data, args.priority, args.queue,
+                                       adaptive, args.profile))
+        written.append(str(fname))
+
+    print("Wrote files:")
+    for f in written:
+        print("  -", f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import textwrap
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "job_tools"))
+from jobgen import timing_fields  # noqa: E402
+
+IMAGE = "gitlab-registry.nrp-nautilus.io/jmduarte/hbb_interaction_network:latest"
+JOB_TOOLS_CM = "jjepa-job-tools"   # built by job_tools/gen_job_tools_configmap.py
+
+BENCH_ROOT = "/j-jepa-vol/J-JEPA-Alan/io_bench"
+SHARD_DIR = "/j-jepa-vol/J-JEPA/data/top/train"   # existing HDF5 shards, read-only tests
+
+LEVELS = "1,4,16"
+TOTAL_MB = 4096
+
+
+def emit_bench_job_yaml(node: Optional[str], levels: str, total_mb: int) -> str:
+    """
+    Build the storage benchmark Job. It mounts the same volumes as the training
+    jobs (j-jepa-vol PVC, 64Gi memory-backed dshm) plus a node-local emptyDir and
+    runs job_tools/io_bench.py against each of them. Reports go to
+    BENCH_ROOT/reports (one JSON per run plus history.jsonl).
+    node: pin to one kubernetes.io/hostname, or None to let the scheduler pick.
+    """
+    job_name = "alan-jjepa-io-bench" if node is None else f"alan-jjepa-io-bench-{node.split('.')[0]}"
+
+    if node is None:
+        node_terms = """\
+            - matchExpressions:
+              - key: kubernetes.io/hostname
+                operator: NotIn
+                values:
+                  - ry-gpu-15.sdsc.optiputer.net
+                  - gpn-fiona-mizzou-7.rnet.missouri.edu
+                  - prp-gpu-3.t2.ucsd.edu
+"""
+    else:
+        node_terms = f"""\
+            - matchExpressions:
+              - key: kubernetes.io/hostname
+                operator: In
+                values:
+                  - {node}
+"""
+
+    _, _, runner_pre = timing_fields("io-bench", job_name)
+    runner_pre = textwrap.indent(runner_pre, " " * 10)
+
+    yaml = f"""apiVersion: batch/v1
+kind: Job
+metadata:
+  name: {job_name}
+  namespace: cms-ml
+  labels: {{ jobgroup: jjepa-job }}
+spec:
+  completions: 1
+  parallelism: 1
+  backoffLimit: 0
+  template:
+    spec:
+      restartPolicy: Never
+      tolerations:
+        - key: "nautilus.io/hardware"
+          operator: "Equal"
+          value: "gpu"
+          effect: "NoSchedule"
+      affinity:
+        nodeAffinity:
+          requiredDuringSchedulingIgnoredDuringExecution:
+            nodeSelectorTerms:
+{node_terms}      containers:
+      - name: runner
+        image: {IMAGE}
+        env:
+        - name: POD_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
+        command: ["/bin/bash","-lc"]
+        args:
+        - |
+          set -euo pipefail
+{runner_pre}          # scratch files on the PVC are removed even when the bench fails or the pod is stopped
+          trap 'phase cleanup rm -rf {BENCH_ROOT}/scratch/$POD_NAME' EXIT
+          trap 'exit 143' TERM
+          phase bench python -u /job-tools/io_bench.py run \\
+            --target pvc={BENCH_ROOT}/scratch/$POD_NAME \\
+            --target shm=/dev/shm/io_bench \\
+            --target local=/scratch/io_bench \\
+            --shard-dir {SHARD_DIR} \\
+            --levels {levels} \\
+            --total-mb {total_mb} \\
+            --out-dir {BENCH_ROOT}/reports
+        resources:
+          requests: {{ cpu: "4", memory: 16Gi, ephemeral-storage: "8Gi" }}
+          limits:   {{ cpu: "4", memory: 16Gi, ephemeral-storage: "16Gi" }}
+        volumeMounts:
+        - {{ name: j-jepa-vol, mountPath: /j-jepa-vol }}
+        - {{ name: dshm,       mountPath: /dev/shm }}
+        - {{ name: scratch,    mountPath: /scratch }}
+        - {{ name: job-tools,  mountPath: /job-tools, readOnly: true }}
+      volumes:
+      - {{ name: j-jepa-vol, persistentVolumeClaim: {{ claimName: j-jepa-vol }} }}
+      - {{ name: dshm, emptyDir: {{ medium: Memory, sizeLimit: 64Gi }} }}
+      - {{ name: scratch, emptyDir: {{}} }}
+      - {{ name: job-tools, configMap: {{ name: {JOB_TOOLS_CM} }} }}
+"""
+    return yaml
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the storage I/O benchmark Job YAML.")
+    parser.add_argument("--node", action="append", default=None,
+                        help="pin a benchmark job to this node (repeatable); default lets the scheduler pick")
+    parser.add_argument("--levels", default=LEVELS, help="comma-separated concurrency levels")
+    parser.add_argument("--total-mb", type=int, default=TOTAL_MB, help="MB written per target and level")
+    args = parser.parse_args()
+
+    out_dir = Path(".")
+    written = []
+
+    for node in args.node or [None]:
+        job_yaml = emit_bench_job_yaml(node, args.levels, args.total_mb)
+        suffix = "" if node is None else f"-{node.split('.')[0]}"
+        fname = out_dir / f"alan-jjepa-io-bench{suffix}.yaml"
+        fname.write_text(job_yaml)
+        written.append(str(fname))
+
+    print("Wrote files:")
+    for f in written:
+        print("  -", f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Skip re-evaluating checkpoints whose content was already evaluated.
+
+best_acc and best_rej are often saved at the same epoch, in which case every
+trial's checkpoint is byte-identical and test_eval_ptcl would redo the same
+full test-set pass. The eval loops call this around each evaluation:
+
+    KEY="--digest-file F --repo /opt/repo/J-JEPA --export none --eval-key '-m src.evaluation.test_eval_ptcl OPTIONS'"
+    if python /job-tools/ckpt_dedupe.py reuse --parent-dir D --checkpoint-type best_rej $KEY; then
+        continue   # test_summary_best_rej.json written from an identical result
+    fi
+    python -m src.evaluation.test_eval_ptcl OPTIONS --parent-dir D --checkpoint-type best_rej
+    python /job-tools/ckpt_dedupe.py record --parent-dir D --checkpoint-type best_rej $KEY
+
+The content digest covers every checkpoint file below the parent dir whose
+relative path mentions the checkpoint type, so it is only equal when all trials
+match. A summary is looked up by that digest together with the commit of the
+evaluation code (--repo), the export_eval.py dtype (--export, "none" for
+eager) and the evaluation command and options (--eval-key, everything but the
+checkpoint type), so a changed test_eval_ptcl or other options are evaluated
+again. A summary whose "export" entry (written by export_eval.py) does not
+match --export is never reused. Keys are kept in <parent-dir>/checkpoint_hashes.json.
+reuse writes the key it computed to the pod-local --digest-file and record
+claims that one, so the summary is tied to the checkpoints that existed when
+the evaluation started and the files are only walked once.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+INDEX_NAME = "checkpoint_hashes.json"
+CKPT_SUFFIXES = (".pth", ".pt", ".ckpt")
+CHUNK = 16 * 1024 * 1024
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def summary_name(ckpt_type):
+    return f"test_summary_{ckpt_type}.json"
+
+
+def load_index(parent_dir):
+    path = os.path.join(parent_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return {"digests": {}, "files": {}}
+    with open(path, "r") as f:
+        index = json.load(f)
+    index.setdefault("digests", {})
+    index.setdefault("files", {})
+    return index
+
+
+def save_index(parent_dir, index, claim=None):
+    """
+    Merge `index` into whatever a concurrent job wrote since it was loaded.
+    claim=(key, summary) makes that summary belong to this key only.
+    """
+    current = load_index(parent_dir)
+    current["digests"].update(index["digests"])
+    current["files"].update(index["files"])
+    if claim is not None:
+        key, summary = claim
+        current["digests"] = {d: name for d, name in current["digests"].items() if name != summary}
+        current["digests"][key] = summary
+    path = os.path.join(parent_dir, INDEX_NAME)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(current, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def checkpoint_files(parent_dir, ckpt_type):
+    found = []
+    for dirpath, dirnames, filenames in os.walk(parent_dir):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            if not fname.endswith(CKPT_SUFFIXES):
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, fname), parent_dir)
+            if ckpt_type in rel:
+                found.append(rel)
+    return found
+
+
+def content_digest(parent_dir, ckpt_type, index):
+    """
+    Digest over (normalised relative path, file sha256) of every checkpoint of
+    this type; None when there are no checkpoint files. Per-file hashes are
+    cached in the index by (size, mtime), so unchanged files are not re-read.
+    """
+    files = checkpoint_files(parent_dir, ckpt_type)
+    if not files:
+        return None
+
+    h = hashlib.sha256()
+    for rel in files:
+        full = os.path.join(parent_dir, rel)
+        st = os.stat(full)
+        stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        cached = index["files"].get(rel)
+        if cached is None or cached["stamp"] != stamp:
+            cached = {"stamp": stamp, "sha256": file_sha256(full)}
+            index["files"][rel] = cached
+        h.update(rel.replace(ckpt_type, "{ckpt}").encode())
+        h.update(b"\0")
+        h.update(cached["sha256"].encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def repo_rev(repo):
+    """
+    Commit checked out in repo, read from .git when the git binary is missing;
+    "unknown" when neither works.
+    """
+    if repo is None:
+        return "unknown"
+    try:
+        return subprocess.run(["git", "-C", repo, "rev-parse", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    git_dir = os.path.join(repo, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[len("ref: "):]
+        if os.path.exists(os.path.join(git_dir, ref)):
+            with open(os.path.join(git_dir, ref), "r") as f:
+                return f.read().strip()
+        with open(os.path.join(git_dir, "packed-refs"), "r") as f:
+            for line in f:
+                if line.rstrip("\n").endswith(" " + ref):
+                    return line.split()[0]
+    except OSError:
+        pass
+    return "unknown"
+
+
+def dedupe_key(digest, args):
+    """
+    Index key: checkpoint content digest + evaluation code commit + export dtype + evaluation options.
+    """
+    h = hashlib.sha256()
+    for part in (digest, repo_rev(args.repo), args.export, args.eval_key):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def summary_export(path):
+    """
+    Export dtype a summary was evaluated with; "none" for eager results.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data.get("export", {}).get("dtype", "none"), data
+
+
+def cmd_reuse(args):
+    if args.digest_file and os.path.exists(args.digest_file):
+        os.remove(args.digest_file)
+    index = load_index(args.parent_dir)
+    digest = content_digest(args.parent_dir, args.checkpoint_type, index)
+    if digest is None:
+        print(f"[dedupe] no {args.checkpoint_type} checkpoints under {args.parent_dir}; evaluating", flush=True)
+        return 1
+    save_index(args.parent_dir, index)
+    key = dedupe_key(digest, args)
+    if args.digest_file:
+        with open(args.digest_file, "w") as f:
+            f.write(f"{args.parent_dir}\t{args.checkpoint_type}\t{key}\n")
+
+    target = summary_name(args.checkpoint_type)
+    target_path = os.path.join(args.parent_dir, target)
+    source = index["digests"].get(key)
+    if source is None or not os.path.exists(os.path.join(args.parent_dir, source)):
+        print(f"[dedupe] {args.checkpoint_type} digest {digest[:12]} not evaluated yet with this code and options",
+              flush=True)
+        return 1
+
+    source_export, data = summary_export(os.path.join(args.parent_dir, source))
+    if source_export != args.export:
+        print(f"[dedupe] {source} was evaluated with export {source_export}, not {args.export}; evaluating",
+              flush=True)
+        return 1
+
+    if source == target and repo_rev(args.repo) == "unknown":
+        # without the code version an older summary of the same type may be stale
+        print(f"[dedupe] evaluation code version unknown; re-evaluating {target}", flush=True)
+        return 1
+
+    if source == target:
+        print(f"[dedupe] {target} already matches checkpoint digest {digest[:12]}, code and options; skipping",
+              flush=True)
+        return 0
+
+    data["reused_from"] = source
+    data["checkpoint_sha256"] = digest
+    data["dedupe_key"] = key
+    tmp = f"{target_path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, target_path)
+
+    print(f"[dedupe] {args.checkpoint_type} checkpoints identical to {source}; wrote {target} as a reference", flush=True)
+    return 0
+
+
+def saved_key(args):
+    """
+    Key reuse wrote for this parent dir / checkpoint type, or None.
+    """
+    if not args.digest_file or not os.path.exists(args.digest_file):
+        return None
+    with open(args.digest_file, "r") as f:
+        parent_dir, ckpt_type, key = f.read().rstrip("\n").split("\t")
+    return key if (parent_dir, ckpt_type) == (args.parent_dir, args.checkpoint_type) else None
+
+
+def cmd_record(args):
+    index = load_index(args.parent_dir)
+    key = saved_key(args)
+    if key is None:
+        digest = content_digest(args.parent_dir, args.checkpoint_type, index)
+        key = None if digest is None else dedupe_key(digest, args)
+    target = summary_name(args.checkpoint_type)
+    if key is None or not os.path.exists(os.path.join(args.parent_dir, target)):
+        print(f"[dedupe] nothing to record for {args.checkpoint_type} in {args.parent_dir}", flush=True)
+        return 0
+    save_index(args.parent_dir, index, claim=(key, target))
+    print(f"[dedupe] recorded {target} for key {key[:12]}", flush=True)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name, func in [("reuse", cmd_reuse), ("record", cmd_record)]:
+        p = sub.add_parser(name)
+        p.add_argument("--parent-dir", required=True)
+        p.add_argument("--checkpoint-type", required=True)
+        p.add_argument("--digest-file", default=None,
+                       help="pod-local file where reuse leaves the key for record")
+        p.add_argument("--repo", default=None, help="checkout of the evaluation code; its commit is part of the key")
+        p.add_argument("--export", default="none",
+                       help="export_eval.py dtype the evaluation runs with, none for eager")
+        p.add_argument("--eval-key", default="",
+                       help="evaluation command and options, everything but the checkpoint type")
+        p.set_defaults(func=func)
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Run a J-JEPA evaluation entry point with each checkpoint's model exported once
+to a traced TorchScript graph in reduced precision.
+
+    python /job-tools/export_eval.py [--dtype fp16] [--atol 0.05 --rtol 0.01] -- -m src.evaluation.test_eval_ptcl ARGS...
+
+The evaluation code is not changed. torch.load is patched to remember which
+checkpoint file was read, and Module.load_state_dict to mark the module that
+received it. On that module's first forward call it is traced with
+torch.jit.trace (weights and floating inputs cast to --dtype, outputs cast back
+to float32) and saved next to the checkpoint as
+
+    <ckpt dir>/.export/<ckpt name>-<sha256[:16]>-<dtype>-<input signature>.torchscript
+
+with a .json sidecar holding the agreement result. Later runs on byte-identical
+checkpoints load the graph instead of tracing again. The first batch of every
+new input shape is also run through the eager fp32 model. If the outputs are
+not allclose(atol, rtol), or tracing or the traced call fails, that model
+falls back to eager for the rest of the run, and the sidecar records the
+decision so the next run goes straight to eager. Reduced precision is only
+used on CUDA; on CPU the graph is traced in fp32.
+
+When the target writes <parent-dir>/test_summary_<checkpoint-type>.json, an
+"export" entry (dtype, atol, rtol and the checkpoints that fell back to eager)
+is added to it, so exported and eager results can be told apart and
+ckpt_dedupe.py does not reuse one for the other.
+
+TorchScript rather than ONNX: onnxruntime is not in the job image, and a
+TorchScript graph runs in the same process as the evaluation loop.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import runpy
+import sys
+import time
+
+import torch
+
+from ckpt_dedupe import file_sha256, summary_name
+
+CKPT_SUFFIXES = (".pth", ".pt", ".ckpt")
+EXPORT_DIR = ".export"
+DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16, "fp32": torch.float32}
+
+_last_ckpt = {"path": None}
+_fallbacks = []        # checkpoint names evaluated eagerly this run
+
+
+def _split_argv(argv):
+    if "--" not in argv:
+        raise SystemExit("usage: export_eval.py [options] -- (-m module | script.py) [args...]")
+    i = argv.index("--")
+    return argv[:i], argv[i + 1:]
+
+
+def _map(obj, fn):
+    if isinstance(obj, torch.Tensor):
+        return fn(obj)
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_map(o, fn) for o in obj)
+    if isinstance(obj, dict):
+        return {k: _map(v, fn) for k, v in obj.items()}
+    return obj
+
+
+def _leaves(obj):
+    if isinstance(obj, torch.Tensor):
+        return [obj]
+    if isinstance(obj, (list, tuple)):
+        return [t for o in obj for t in _leaves(o)]
+    if isinstance(obj, dict):
+        return [t for k in sorted(obj) for t in _leaves(obj[k])]
+    return []
+
+
+def _signature(args):
+    """
+    Short tag for the traced input layout: dtype and non-batch dims per tensor.
+    """
+    parts = [f"{str(t.dtype).replace('torch.', '')}{'x'.join(str(d) for d in t.shape[1:])}" for t in _leaves(args)]
+    return hashlib.sha1("_".join(parts).encode()).hexdigest()[:8] if parts else "noargs"
+
+
+def _shape_key(args):
+    return tuple(tuple(t.shape) for t in _leaves(args))
+
+
+def _strip_nested(module):
+    """
+    Only the outermost exported module is accelerated; drop wrappers below it.
+    """
+    for sub in module.modules():
+        if sub is not module and isinstance(sub.__dict__.get("forward"), Exported):
+            del sub.__dict__["forward"]
+
+
+class Exported:
+    """
+    Per-module export state, reset whenever the module loads a new checkpoint.
+    """
+
+    def __init__(self, module, ckpt, opts):
+        self.module = module
+        self.ckpt = ckpt
+        self.opts = opts
+        self.fn = None          # traced callable, or None while undecided / eager
+        self.eager_only = False
+        self.checked = set()    # input shapes already compared against eager
+        self.meta_path = None
+        self.meta = {}
+
+    def eager(self, *args, **kwargs):
+        return type(self.module).forward(self.module, *args, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        if self.eager_only:
+            return self.eager(*args, **kwargs)
+        if self.fn is None:
+            reason = self._prepare(args, kwargs)
+            if reason:
+                return self._give_up(reason, args, kwargs)
+        shape = _shape_key(args)
+        if shape not in self.checked:
+            return self._checked_call(shape, args, kwargs)
+        try:
+            return self.fn(*args)
+        except RuntimeError as exc:
+            return self._give_up(f"traced call failed: {exc}", args, kwargs)
+
+    def _give_up(self, reason, args, kwargs, result=None):
+        print(f"[export] {os.path.basename(self.ckpt)}: eager fallback ({reason})", flush=True)
+        _fallbacks.append(os.path.basename(self.ckpt))
+        self.eager_only = True
+        self.fn = None
+        if self.meta_path is not None:
+            self._write_meta(agreed=False, reason=reason)
+        return self.eager(*args, **kwargs) if result is None else result
+
+    def _write_meta(self, **fields):
+        self.meta.update(fields)
+        tmp = f"{self.meta_path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, self.meta_path)
+
+    def _prepare(self, args, kwargs):
+        """
+        Load or trace the graph; returns a reason string when eager is used instead.
+        """
+        m = self.module
+        if kwargs:
+            return "forward called with keyword arguments"
+        if m.training:
+            return "module is in training mode"
+        tensors = _leaves(args)
+        if not tensors:
+            return "no tensor inputs"
+        device = tensors[0].device
+        dtype = DTYPES[self.opts.dtype] if device.type == "cuda" else torch.float32
+        dtype_name = str(dtype).replace("torch.", "")
+
+        digest = file_sha256(self.ckpt)
+        export_dir = os.path.join(os.path.dirname(os.path.abspath(self.ckpt)), EXPORT_DIR)
+        stem = os.path.splitext(os.path.basename(self.ckpt))[0]
+        path = os.path.join(export_dir, f"{stem}-{digest[:16]}-{dtype_name}-{_signature(args)}.torchscript")
+        self.meta_path = path + ".json"
+        self.meta = {"checkpoint": self.ckpt, "sha256": digest, "dtype": dtype_name}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                if json.load(f).get("agreed") is False:
+                    self.meta_path = None   # keep the earlier verdict as it is
+                    return "disagreed with eager in an earlier run"
+
+        def cast_in(t):
+            return t.to(dtype) if t.is_floating_point() else t
+
+        def cast_out(t):
+            return t.float() if t.is_floating_point() else t
+
+        t0 = time.time()
+        if os.path.exists(path):
+            graph = torch.jit.load(path, map_location=device)
+            how = "loaded"
+        else:
+            # the instance-level forward (this wrapper) must not be copied or traced
+            wrapper = m.__dict__.pop("forward")
+            try:
+                low = copy.deepcopy(m).to(dtype).eval()
+                _strip_nested(low)
+                with torch.no_grad():
+                    graph = torch.jit.trace(low, _map(args, cast_in), check_trace=False, strict=False)
+                try:
+                    graph = torch.jit.freeze(graph)
+                except Exception:   # freezing is an optimisation only
+                    pass
+            except Exception as exc:
+                return f"trace failed: {exc}"
+            finally:
+                m.forward = wrapper
+            os.makedirs(export_dir, exist_ok=True)
+            tmp = f"{path}.tmp.{os.getpid()}"
+            torch.jit.save(graph, tmp)
+            os.replace(tmp, path)
+            how = "traced"
+        print(f"[export] {os.path.basename(self.ckpt)}: {how} {dtype_name} graph in {time.time() - t0:.1f}s -> {path}",
+              flush=True)
+
+        def run(*a):
+            with torch.no_grad():
+                return _map(graph(*_map(a, cast_in)), cast_out)
+
+        _strip_nested(m)
+        self.fn = run
+        self._write_meta(graph=os.path.basename(path), agreed=None)
+        return None
+
+    def _checked_call(self, shape, args, kwargs):
+        ref = self.eager(*args, **kwargs)
+        try:
+            got = self.fn(*args)
+        except RuntimeError as exc:
+            return self._give_up(f"traced call failed: {exc}", args, kwargs, ref)
+        ref_t, got_t = _leaves(ref), _leaves(got)
+        if len(ref_t) != len(got_t) or any(a.shape != b.shape for a, b in zip(ref_t, got_t)):
+            return self._give_up("output structure differs from eager", args, kwargs, ref)
+        max_diff = 0.0
+        ok = True
+        for a, b in zip(ref_t, got_t):
+            if a.is_floating_point():
+                a32 = a.detach().float()
+                max_diff = max(max_diff, (a32 - b).abs().max().item() if a.numel() else 0.0)
+                ok = ok and torch.allclose(b, a32, atol=self.opts.atol, rtol=self.opts.rtol)
+            else:
+                ok = ok and torch.equal(a, b)
+        if not ok:
+            return self._give_up(f"max |diff| {max_diff:.3g} vs eager exceeds atol={self.opts.atol} rtol={self.opts.rtol}",
+                                 args, kwargs, ref)
+        self.checked.add(shape)
+        self._write_meta(agreed=True, max_abs_diff=max(max_diff, self.meta.get("max_abs_diff", 0.0)),
+                         checked_shapes=[list(map(list, s)) for s in sorted(self.checked)])
+        print(f"[export] {os.path.basename(self.ckpt)}: agrees with eager on {list(shape)} (max |diff| {max_diff:.3g})",
+              flush=True)
+        # the caller still gets the eager result for this batch
+        return ref
+
+
+def install_hooks(opts):
+    orig_load = torch.load
+    orig_load_state_dict = torch.nn.Module.load_state_dict
+
+    def load(f, *args, **kwargs):
+        if isinstance(f, (str, os.PathLike)) and str(f).endswith(CKPT_SUFFIXES):
+            _last_ckpt["path"] = os.fspath(f)
+        return orig_load(f, *args, **kwargs)
+
+    def load_state_dict(self, *args, **kwargs):
+        result = orig_load_state_dict(self, *args, **kwargs)
+        ckpt, _last_ckpt["path"] = _last_ckpt["path"], None
+        if ckpt is not None:
+            # a new checkpoint invalidates whatever was exported for this module
+            self.forward = Exported(self, ckpt, opts)
+        return result
+
+    torch.load = load
+    torch.nn.Module.load_state_dict = load_state_dict
+
+
+def run_target(target):
+    if target[0] == "-m":
+        sys.argv = target[1:]
+        runpy.run_module(target[1], run_name="__main__", alter_sys=True)
+    else:
+        sys.argv = target
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target[0])))
+        runpy.run_path(target[0], run_name="__main__")
+
+
+def tag_summary(target, opts, started):
+    """
+    Add the export settings to the summary the target wrote this run, if any.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--parent-dir")
+    parser.add_argument("--checkpoint-type")
+    known, _ = parser.parse_known_args(target)
+    if known.parent_dir is None or known.checkpoint_type is None:
+        return
+    path = os.path.join(known.parent_dir, summary_name(known.checkpoint_type))
+    if not os.path.exists(path) or os.path.getmtime(path) < int(started):
+        print(f"[export] no new {path} to tag", flush=True)
+        return
+    with open(path, "r") as f:
+        data = json.load(f)
+    data["export"] = {"dtype": opts.dtype, "atol": opts.atol, "rtol": opts.rtol,
+                      "eager_fallbacks": sorted(set(_fallbacks))}
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    own, target = _split_argv(sys.argv[1:])
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default="fp16", help="precision of the exported graph on CUDA")
+    parser.add_argument("--atol", type=float, default=5e-2)
+    parser.add_argument("--rtol", type=float, default=1e-2)
+    opts = parser.parse_args(own)
+    if not target:
+        parser.error("missing target after '--'")
+
+    install_hooks(opts)
+    started = time.time()
+    try:
+        run_target(target)
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            raise
+    tag_summary(target, opts, started)
+
+
+if __name__ == "__main__":
+    main()
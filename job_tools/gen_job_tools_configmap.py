@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from pathlib import Path
+
+CONFIGMAP_NAME = "jjepa-job-tools"
+TOOLS_DIR = Path(__file__).resolve().parent
+LOCAL_ONLY = {Path(__file__).name, "jobgen.py"}   # generator-side helpers, not run in pods
+
+
+def emit_configmap_yaml(tool_files) -> str:
+    """
+    Build the ConfigMap that ships the helper scripts in job_tools/ to the pods.
+    Jobs mount it read-only at /job-tools.
+    """
+    data = []
+    for path in tool_files:
+        body = "".join(f"    {line}" if line.strip() else "\n" for line in path.read_text().splitlines(True))
+        if not body.endswith("\n"):
+            body += "\n"
+        data.append(f"  {path.name}: |\n{body}")
+
+    yaml = f"""apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: {CONFIGMAP_NAME}
+  namespace: cms-ml
+  labels: {{ jobgroup: jjepa-job }}
+data:
+{"".join(data)}"""
+    return yaml
+
+
+def main():
+    tool_files = sorted(p for p in TOOLS_DIR.glob("*.py") if p.name not in LOCAL_ONLY)
+    fname = Path(".") / f"{CONFIGMAP_NAME}.yaml"
+    fname.write_text(emit_configmap_yaml(tool_files))
+
+    print("Wrote files:")
+    print("  -", fname)
+    for p in tool_files:
+        print("      *", p.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Storage I/O benchmark for the volumes the J-JEPA jobs use (j-jepa-vol PVC,
+memory-backed /dev/shm, node-local emptyDir).
+
+    python io_bench.py run --target pvc=/j-jepa-vol/J-JEPA-Alan/io_bench/scratch \\
+                           --target shm=/dev/shm/io_bench \\
+                           --shard-dir /j-jepa-vol/J-JEPA/data/top/train \\
+                           --levels 1,4,16 --out-dir /j-jepa-vol/J-JEPA-Alan/io_bench/reports
+    python io_bench.py show /j-jepa-vol/J-JEPA-Alan/io_bench/reports/history.jsonl
+
+Per target and concurrency level it measures:
+  ckpt_write   sequential write + fsync (checkpoint saves)
+  seq_read     sequential read of the files just written
+  rand_read    random fixed-size reads
+  small_stat   os.stat on many small files
+  small_open   open + read of the first block of many small files
+With --shard-dir the small-file tests also run read-only against the existing
+dataset shards (target name "shards"). Runs locally as well, e.g.
+--target local=/tmp/io_bench.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SCHEMA = 1
+BLOCK = 8 * 1024 * 1024
+
+
+def _drop_cache(path):
+    # best effort: local filesystems honour this, network filesystems may not
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _percentiles(lat_s):
+    if not lat_s:
+        return {}
+    lat = sorted(x * 1000.0 for x in lat_s)
+
+    def pct(p):
+        return round(lat[min(len(lat) - 1, int(p * len(lat)))], 4)
+
+    return {"p50": pct(0.50), "p90": pct(0.90), "p99": pct(0.99), "max": round(lat[-1], 4),
+            "mean": round(statistics.fmean(lat), 4)}
+
+
+def _result(target, test, concurrency, seconds, nbytes=0, ops=0, lat_s=None):
+    row = {
+        "target": target,
+        "test": test,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 4),
+        "bytes": nbytes,
+        "ops": ops,
+        "mb_per_s": round(nbytes / seconds / 1e6, 2) if nbytes and seconds else None,
+        "ops_per_s": round(ops / seconds, 1) if ops and seconds else None,
+    }
+    if lat_s is not None:
+        row["lat_ms"] = _percentiles(lat_s)
+    return row
+
+
+def _parallel(fn, items, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        out = list(pool.map(fn, items))
+    return time.perf_counter() - start, out
+
+
+def bench_large_files(name, root, concurrency, total_mb, rand_block_kb, rand_reads):
+    per_file = max(1, total_mb // concurrency) * 1024 * 1024
+    paths = [os.path.join(root, f"blob_{concurrency}_{i}.bin") for i in range(concurrency)]
+    payload = os.urandom(BLOCK)
+
+    def write(path):
+        with open(path, "wb") as f:
+            left = per_file
+            while left > 0:
+                n = min(left, BLOCK)
+                f.write(payload[:n])
+                left -= n
+            f.flush()
+            os.fsync(f.fileno())
+        return per_file
+
+    def seq_read(path):
+        _drop_cache(path)
+        n = 0
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                chunk = f.read(BLOCK)
+                if not chunk:
+                    break
+                n += len(chunk)
+        return n
+
+    block = rand_block_kb * 1024
+    reads_per_file = max(1, rand_reads // concurrency)
+
+    def rand_read(path):
+        _drop_cache(path)
+        rng = random.Random(path)
+        lat = []
+        with open(path, "rb", buffering=0) as f:
+            for _ in range(reads_per_file):
+                off = rng.randrange(0, max(1, per_file - block))
+                t0 = time.perf_counter()
+                f.seek(off)
+                f.read(block)
+                lat.append(time.perf_counter() - t0)
+        return lat
+
+    rows = []
+    secs, sizes = _parallel(write, paths, concurrency)
+    rows.append(_result(name, "ckpt_write", concurrency, secs, nbytes=sum(sizes), ops=len(paths)))
+    secs, sizes = _parallel(seq_read, paths, concurrency)
+    rows.append(_result(name, "seq_read", concurrency, secs, nbytes=sum(sizes), ops=len(paths)))
+    secs, lats = _parallel(rand_read, paths, concurrency)
+    lat = [x for chunk in lats for x in chunk]
+    rows.append(_result(name, "rand_read", concurrency, secs, nbytes=len(lat) * block, ops=len(lat), lat_s=lat))
+
+    for p in paths:
+        os.remove(p)
+    return rows
+
+
+def _small_file_rows(name, paths, concurrency, read_bytes):
+    def stat(path):
+        t0 = time.perf_counter()
+        os.stat(path)
+        return time.perf_counter() - t0
+
+    def open_read(path):
+        t0 = time.perf_counter()
+        with open(path, "rb", buffering=0) as f:
+            f.read(read_bytes)
+        return time.perf_counter() - t0
+
+    rows = []
+    secs, lat = _parallel(stat, paths, concurrency)
+    rows.append(_result(name, "small_stat", concurrency, secs, ops=len(lat), lat_s=lat))
+    secs, lat = _parallel(open_read, paths, concurrency)
+    rows.append(_result(name, "small_open", concurrency, secs, ops=len(lat), lat_s=lat))
+    return rows
+
+
+def bench_small_files(name, root, concurrency, n_files, file_kb):
+    sub = os.path.join(root, f"small_{concurrency}")
+    os.makedirs(sub, exist_ok=True)
+    payload = os.urandom(file_kb * 1024)
+    paths = []
+    for i in range(n_files):
+        path = os.path.join(sub, f"shard_{i:05d}.h5")
+        with open(path, "wb") as f:
+            f.write(payload)
+        paths.append(path)
+    for path in paths:
+        _drop_cache(path)
+    rows = _small_file_rows(name, paths, concurrency, min(4096, len(payload)))
+    shutil.rmtree(sub)
+    return rows
+
+
+def shard_paths(shard_dir, limit):
+    paths = []
+    for dirpath, _, filenames in os.walk(shard_dir):
+        for fname in sorted(filenames):
+            paths.append(os.path.join(dirpath, fname))
+            if len(paths) >= limit:
+                return paths
+    return paths
+
+
+def cmd_run(args):
+    targets = []
+    for spec in args.target:
+        name, _, path = spec.partition("=")
+        if not path:
+            raise SystemExit(f"--target expects NAME=PATH, got {spec!r}")
+        targets.append((name, path))
+    levels = [int(x) for x in args.levels.split(",")]
+
+    report = {
+        "schema": SCHEMA,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": socket.gethostname(),
+        "pod": os.environ.get("POD_NAME", ""),
+        "node": os.environ.get("NODE_NAME", ""),
+        "params": {
+            "levels": levels,
+            "total_mb": args.total_mb,
+            "rand_block_kb": args.rand_block_kb,
+            "rand_reads": args.rand_reads,
+            "small_files": args.small_files,
+            "small_file_kb": args.small_file_kb,
+        },
+        "targets": dict(targets),
+        "results": [],
+    }
+
+    for name, path in targets:
+        os.makedirs(path, exist_ok=True)
+        for c in levels:
+            print(f"[io_bench] {name} ({path}) concurrency={c}", flush=True)
+            report["results"] += bench_large_files(name, path, c, args.total_mb, args.rand_block_kb, args.rand_reads)
+            report["results"] += bench_small_files(name, path, c, args.small_files, args.small_file_kb)
+
+    if args.shard_dir:
+        paths = shard_paths(args.shard_dir, args.small_files)
+        report["targets"]["shards"] = args.shard_dir
+        for c in levels:
+            print(f"[io_bench] shards ({args.shard_dir}, {len(paths)} files) concurrency={c}", flush=True)
+            # the same shards are read at every level; without this only the first level reaches the volume
+            for p in paths:
+                _drop_cache(p)
+            report["results"] += _small_file_rows("shards", paths, c, 4096)
+
+    print_rows(report["results"])
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        stamp = report["timestamp"][:19].replace(":", "").replace("-", "")
+        fname = os.path.join(args.out_dir, f"io_bench_{stamp}_{report['host']}.json")
+        with open(fname, "w") as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.join(args.out_dir, "history.jsonl"), "a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"[io_bench] wrote {fname}", flush=True)
+
+
+def load_reports(paths):
+    reports = []
+    for path in paths:
+        with open(path, "r") as f:
+            if path.endswith(".jsonl"):
+                reports += [json.loads(line) for line in f if line.strip()]
+            else:
+                reports.append(json.load(f))
+    reports.sort(key=lambda r: r["timestamp"])
+    return reports
+
+
+def print_rows(rows):
+    if not rows:
+        print("No results.")
+        return
+    cols = ["target", "test", "concurrency", "mb_per_s", "ops_per_s", "p50_ms", "p99_ms"]
+    table = []
+    for r in rows:
+        lat = r.get("lat_ms", {})
+        table.append({
+            "target": r["target"],
+            "test": r["test"],
+            "concurrency": r["concurrency"],
+            "mb_per_s": r["mb_per_s"] if r["mb_per_s"] is not None else "-",
+            "ops_per_s": r["ops_per_s"] if r["ops_per_s"] is not None else "-",
+            "p50_ms": lat.get("p50", "-"),
+            "p99_ms": lat.get("p99", "-"),
+        })
+    col_widths = {c: max(len(c), max(len(str(r[c])) for r in table)) for c in cols}
+    print(" | ".join(f"{c:{col_widths[c]}}" for c in cols))
+    print("-+-".join("-" * col_widths[c] for c in cols))
+    for r in table:
+        print(" | ".join(f"{str(r[c]):{col_widths[c]}}" for c in cols))
+
+
+def cmd_show(args):
+    reports = load_reports(args.reports)
+    if not reports:
+        print("No reports found.")
+        return
+    for report in reports[-args.last:]:
+        print(f"== {report['timestamp']}  host={report['host']}  node={report.get('node', '')}")
+        print_rows(report["results"])
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="run the benchmark")
+    run.add_argument("--target", action="append", required=True, help="NAME=PATH of a writable scratch dir")
+    run.add_argument("--shard-dir", default=None, help="existing dataset dir for read-only small-file tests")
+    run.add_argument("--levels", default="1,4,16", help="comma-separated concurrency levels")
+    run.add_argument("--total-mb", type=int, default=2048, help="bytes written per level, split across workers")
+    run.add_argument("--rand-block-kb", type=int, default=64)
+    run.add_argument("--rand-reads", type=int, default=2000, help="random reads per level")
+    run.add_argument("--small-files", type=int, default=2000)
+    run.add_argument("--small-file-kb", type=int, default=16)
+    run.add_argument("--out-dir", default=None, help="write a report JSON and append to history.jsonl here")
+    run.set_defaults(func=cmd_run)
+
+    show = sub.add_parser("show", help="print reports (JSON files or history.jsonl)")
+    show.add_argument("reports", nargs="+")
+    show.add_argument("--last", type=int, default=1, help="number of most recent runs to print")
+    show.set_defaults(func=cmd_show)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
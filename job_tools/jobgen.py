@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Snippets shared by the job generators (training/, finetune_*/, test*/,
+io_bench/, retention/). Imported at generation time only; it is not shipped
+in the jjepa-job-tools ConfigMap.
+"""
+
+TIMING_ROOT = "/j-jepa-vol/J-JEPA-Alan/timing"   # phase timings, timing/aggregate_timings.py
+PHASE_FMT = '{"stage":"%s","job":"%s","phase":"%s","start":%s,"end":%s,"exit_code":%d,"pod":"%s","node":"%s"}\\n'
+
+# Shortest-expected-job-first priorities (--priority): jobs are ranked by
+# predicted minutes / (1 + number of downstream jobs they unblock)
+PRIORITY_TIERS = [(30, "jjepa-quick"), (240, "jjepa-short"), (1440, "jjepa-medium")]
+PRIORITY_LAST = "jjepa-long"
+
+# Adaptive trial count (--adaptive): start with ADAPTIVE_MIN_TRIALS trials and let
+# adaptive/adaptive_trials.py add more until the 95% CI of ADAPTIVE_METRIC over
+# the ADAPTIVE_CHECKPOINT test results is narrower than the CI width
+ADAPTIVE_MIN_TRIALS = 3
+ADAPTIVE_MAX_TRIALS = 10
+ADAPTIVE_CI_WIDTH = 0.01           # full width of the interval, in metric units
+ADAPTIVE_METRIC = "acc"
+ADAPTIVE_CHECKPOINT = "best_acc"
+
+
+def priority_fields(stage: str, minutes: float, unblocks: int, depends_on=(), provides=()) -> tuple:
+    """
+    Annotations (read by scheduling/plan_sweep.py) and the priorityClassName
+    line for one job; see PRIORITY_TIERS. provides lists the job names this
+    job stands in for (finetune_combined), so dependents on those wait for it.
+    """
+    score = minutes / (1 + unblocks)
+    pclass = next((name for limit, name in PRIORITY_TIERS if score <= limit), PRIORITY_LAST)
+    annotations = (
+        "  annotations:\n"
+        f"    jjepa/stage: {stage}\n"
+        f'    jjepa/predicted-minutes: "{minutes:.0f}"\n'
+        f'    jjepa/unblocks: "{unblocks}"\n'
+        f'    jjepa/priority-score: "{score:.1f}"\n'
+        f'    jjepa/depends-on: "{",".join(depends_on)}"\n'
+    )
+    if provides:
+        annotations += f'    jjepa/provides: "{",".join(provides)}"\n'
+    return annotations, f"      priorityClassName: {pclass}\n"
+
+
+def timing_fields(stage: str, job_name: str) -> tuple:
+    """
+    Shell snippets for per-phase timing. The init container times the clone
+    into /opt/repo/.phase_init.jsonl; the runner copies that to its timing file
+    (TIMING_ROOT/<stage>/<job>/$POD_NAME.jsonl) and defines `phase NAME cmd...`,
+    which runs cmd, appends one JSON line and passes the exit code through.
+    Returns (init_pre, init_post, runner_pre), unindented.
+    """
+    init_pre = "start=$(date +%s.%N); rc=0\n"
+    init_post = (
+        f"printf '{PHASE_FMT}' {stage} {job_name} clone \"$start\" \"$(date +%s.%N)\" \"$rc\" \"$POD_NAME\" \"$NODE_NAME\" \\\n"
+        "  > /opt/repo/.phase_init.jsonl\n"
+        "exit $rc\n"
+    )
+    runner_pre = (
+        f"TIMING_FILE={TIMING_ROOT}/{stage}/{job_name}/$POD_NAME.jsonl\n"
+        'mkdir -p "$(dirname "$TIMING_FILE")"\n'
+        'cat /opt/repo/.phase_init.jsonl >> "$TIMING_FILE" 2>/dev/null || true\n'
+        "phase() {\n"
+        "  local name=$1 start rc=0\n"
+        "  shift\n"
+        "  start=$(date +%s.%N)\n"
+        '  "$@" || rc=$?\n'
+        f"  printf '{PHASE_FMT}' {stage} {job_name} \"$name\" \"$start\" \"$(date +%s.%N)\" \"$rc\" \"$POD_NAME\" \"$NODE_NAME\" \\\n"
+        '    >> "$TIMING_FILE"\n'
+        "  return $rc\n"
+        "}\n"
+    )
+    return init_pre, init_post, runner_pre
+
+
+def adaptive_fields(cells, max_trials: int, ci_width: float) -> tuple:
+    """
+    Annotation lines read by adaptive/adaptive_trials.py, and the runner env /
+    shell line that shift the completion index by TRIAL_OFFSET, so the
+    follow-up Jobs it creates (TRIAL_OFFSET = trials already launched) run
+    new trial indices. Returns (annotations, env, runner_pre), runner_pre unindented.
+    """
+    annotations = (
+        f'    jjepa/adaptive-max-trials: "{max_trials}"\n'
+        f'    jjepa/adaptive-ci-width: "{ci_width:g}"\n'
+        f"    jjepa/adaptive-metric: {ADAPTIVE_METRIC}\n"
+        f"    jjepa/adaptive-checkpoint: {ADAPTIVE_CHECKPOINT}\n"
+        f'    jjepa/adaptive-cells: "{",".join(cells)}"\n'
+    )
+    env = '        - { name: TRIAL_OFFSET, value: "0" }\n'
+    runner_pre = "export JOB_COMPLETION_INDEX=$((JOB_COMPLETION_INDEX + TRIAL_OFFSET))\n"
+    return annotations, env, runner_pre
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Retention / compaction of checkpoints and run artifacts on j-jepa-vol.
+
+    python retention.py --base /j-jepa-vol/J-JEPA-Alan [--apply] [--protect PATH ...]
+                        [--jobs-json jobs.json | --kubectl] [--report report.json]
+
+Locally, with the PVC mounted at e.g. /mnt/j-jepa-vol:
+
+    python retention.py --base /mnt/j-jepa-vol/J-JEPA-Alan --vol-root /mnt/j-jepa-vol --kubectl
+
+Cells are the per-run directories the other jobs write:
+    model_performances_run2/{cls,flatten}/{size}/baseline
+    model_performances_run2/{cls,flatten}/{size}/finetune/{pct}
+    models/JetClass/ptcl_filtered/{pct}
+Inside a cell, intermediate epoch checkpoints are deleted (best_model.pth,
+best_acc / best_rej / last checkpoints and everything that is not a
+checkpoint are kept; a checkpoint counts as best_acc etc. when its path
+relative to the cell says so) and small per-trial logs (*.log, *.out, *.err,
+log*.txt) are packed into one logs_archive.tar.gz per cell.
+
+Default is a dry run that only reports. A cell is skipped entirely when it
+contains or lies under a protected path (--protect, or any /j-jepa-vol path
+referenced by an unfinished Job from --jobs-json / --kubectl), or when anything
+in it changed within --min-age-hours.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import tarfile
+import time
+from datetime import datetime, timezone
+from glob import glob
+
+CELL_GLOBS = [
+    "model_performances_run2/*/*/baseline",
+    "model_performances_run2/*/*/finetune/*",
+    "models/JetClass/ptcl_filtered/*",
+]
+CKPT_SUFFIXES = (".pth", ".pt", ".ckpt")
+KEEP_CKPT = re.compile(r"best_model|best_acc|best_rej|last")
+DROP_CKPT = re.compile(r"epoch[_-]?\d+|(^|[_-])ep\d+")
+LOG_NAME = re.compile(r"\.(log|out|err)$|^log.*\.txt$")   # not hparams.txt and other text outputs
+ARCHIVE_NAME = "logs_archive.tar.gz"
+PATH_RE = re.compile(r"/j-jepa-vol/[^\s\"'\\;|&]+")
+
+
+def _finished(job):
+    for cond in (job.get("status") or {}).get("conditions") or []:
+        if cond.get("status") == "True" and cond.get("type") in ("Complete", "Failed"):
+            return True
+    return False
+
+
+def referenced_paths(jobs_doc):
+    """
+    /j-jepa-vol paths mentioned in the containers of every unfinished Job
+    (pending, suspended or running).
+    """
+    paths = set()
+    for job in jobs_doc.get("items", []):
+        if _finished(job):
+            continue
+        pod_spec = job["spec"]["template"]["spec"]
+        for c in pod_spec.get("initContainers", []) + pod_spec.get("containers", []):
+            text = " ".join((c.get("command") or []) + (c.get("args") or []))
+            for m in PATH_RE.findall(text):
+                # "$ROOT/finetune"/* style references protect their static prefix
+                paths.add(m.split("$")[0].rstrip("/\"*") or "/j-jepa-vol")
+    return paths
+
+
+def kubectl_jobs(namespace):
+    out = subprocess.run(["kubectl", "-n", namespace, "get", "jobs", "-o", "json"],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def _under(path, parent):
+    return path == parent or path.startswith(parent.rstrip("/") + "/")
+
+
+def is_protected(cell, protected):
+    return any(_under(cell, p) or _under(p, cell) for p in protected)
+
+
+def newest_mtime(cell):
+    newest = os.stat(cell).st_mtime
+    for dirpath, _, filenames in os.walk(cell):
+        for fname in filenames:
+            try:
+                newest = max(newest, os.lstat(os.path.join(dirpath, fname)).st_mtime)
+            except FileNotFoundError:
+                pass
+    return newest
+
+
+def plan_cell(cell, small_log_bytes):
+    drop, pack = [], []
+    for dirpath, _, filenames in os.walk(cell):
+        for fname in sorted(filenames):
+            full = os.path.join(dirpath, fname)
+            if fname.endswith(CKPT_SUFFIXES):
+                # keep anything under best_acc/ etc., not only files named that way
+                rel = os.path.relpath(full, cell)
+                if not KEEP_CKPT.search(rel) and DROP_CKPT.search(fname):
+                    drop.append(full)
+            elif LOG_NAME.search(fname) and os.path.getsize(full) <= small_log_bytes:
+                pack.append(full)
+    return drop, pack
+
+
+def pack_logs(cell, files):
+    """
+    Add files to <cell>/logs_archive.tar.gz (members already in the archive are
+    carried over) and remove the originals. Returns the archive size growth.
+    """
+    archive = os.path.join(cell, ARCHIVE_NAME)
+    before = os.path.getsize(archive) if os.path.exists(archive) else 0
+    tmp = f"{archive}.tmp.{os.getpid()}"
+    with tarfile.open(tmp, "w:gz") as out:
+        if os.path.exists(archive):
+            with tarfile.open(archive, "r:gz") as old:
+                for member in old.getmembers():
+                    out.addfile(member, old.extractfile(member) if member.isfile() else None)
+        for f in files:
+            out.add(f, arcname=os.path.relpath(f, cell))
+    os.replace(tmp, archive)
+    for f in files:
+        os.remove(f)
+    return os.path.getsize(archive) - before
+
+
+def run(args):
+    protected = {os.path.normpath(p) for p in args.protect}
+    jobs_doc = None
+    if args.jobs_json:
+        with open(args.jobs_json, "r") as f:
+            jobs_doc = json.load(f)
+    elif args.kubectl:
+        jobs_doc = kubectl_jobs(args.namespace)
+    if jobs_doc is not None:
+        protected |= referenced_paths(jobs_doc)
+    if args.vol_root != "/j-jepa-vol":
+        # local mode with the PVC mounted elsewhere: job paths are pod paths
+        protected = {args.vol_root + p[len("/j-jepa-vol"):] if _under(p, "/j-jepa-vol") else p for p in protected}
+
+    cells = sorted({c for pattern in CELL_GLOBS for c in glob(os.path.join(args.base, pattern)) if os.path.isdir(c)})
+    now = time.time()
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "dry_run": not args.apply,
+        "base": args.base,
+        "protected": sorted(protected),
+        "bytes_reclaimed": 0,
+        "files_deleted": 0,
+        "files_packed": 0,
+        "cells": [],
+    }
+
+    for cell in cells:
+        entry = {"cell": os.path.relpath(cell, args.base)}
+        report["cells"].append(entry)
+        if is_protected(cell, protected):
+            entry["status"] = "protected"
+            continue
+        if now - newest_mtime(cell) < args.min_age_hours * 3600:
+            entry["status"] = "recent"
+            continue
+
+        drop, pack = plan_cell(cell, args.small_log_kb * 1024)
+        if not drop and not pack:
+            entry["status"] = "clean"
+            continue
+
+        drop_bytes = sum(os.path.getsize(f) for f in drop)
+        pack_bytes = sum(os.path.getsize(f) for f in pack)
+        entry.update({
+            "status": "compacted" if args.apply else "would_compact",
+            "deleted": [os.path.relpath(f, cell) for f in drop],
+            "deleted_bytes": drop_bytes,
+            "packed_files": len(pack),
+            "packed_bytes": pack_bytes,
+        })
+        reclaimed = drop_bytes
+        if args.apply:
+            for f in drop:
+                os.remove(f)
+            if pack:
+                reclaimed += pack_bytes - pack_logs(cell, pack)
+        entry["bytes_reclaimed"] = reclaimed
+        report["bytes_reclaimed"] += reclaimed
+        report["files_deleted"] += len(drop)
+        report["files_packed"] += len(pack)
+
+    return report
+
+
+def print_report(report):
+    mode = "DRY RUN" if report["dry_run"] else "APPLIED"
+    print(f"[retention] {mode} under {report['base']}")
+    for entry in report["cells"]:
+        line = f"  {entry['status']:13s} {entry['cell']}"
+        if "deleted" in entry:
+            line += (f"  delete {len(entry['deleted'])} ckpt ({entry['deleted_bytes'] / 1e9:.2f} GB),"
+                     f" pack {entry['packed_files']} logs ({entry['packed_bytes'] / 1e6:.1f} MB)")
+        print(line)
+    verb = "would reclaim" if report["dry_run"] else "reclaimed"
+    print(f"[retention] {verb} {report['bytes_reclaimed'] / 1e9:.2f} GB "
+          f"({report['files_deleted']} checkpoints deleted, {report['files_packed']} logs packed)")
+    if report["dry_run"]:
+        print("[retention] packing savings are only known after --apply; the figure above counts deletions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="/j-jepa-vol/J-JEPA-Alan")
+    parser.add_argument("--apply", action="store_true", help="actually delete / pack (default: dry run)")
+    parser.add_argument("--protect", action="append", default=[], help="never touch cells at or around this path")
+    parser.add_argument("--jobs-json", default=None, help="`kubectl get jobs -o json` output; protects unfinished jobs' paths")
+    parser.add_argument("--kubectl", action="store_true", help="query unfinished jobs with kubectl directly")
+    parser.add_argument("--namespace", default="cms-ml")
+    parser.add_argument("--vol-root", default="/j-jepa-vol", help="where the j-jepa-vol PVC is mounted here")
+    parser.add_argument("--min-age-hours", type=float, default=24.0)
+    parser.add_argument("--small-log-kb", type=int, default=1024)
+    parser.add_argument("--report", default=None, help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[retention] wrote {args.report}")
+
+
+if __name__ == "__main__":
+    main()
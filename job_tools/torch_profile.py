@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Run a J-JEPA entry point under torch.profiler for a bounded number of steps.
+
+Usage (inside a job pod, tools mounted at /job-tools):
+
+    python /job-tools/torch_profile.py --out-dir DIR --steps 50 -- -m src.evaluation.finetune_ptcl ARGS...
+    torchrun ... /job-tools/torch_profile.py --out-dir DIR --steps 50 -- src/models/train_model_ptcl.py ARGS...
+
+A "step" is one batch pulled from any DataLoader, so the same bound works for
+training, probing and evaluation without touching the J-JEPA code. Once
+wait + warmup + steps batches have been fetched the target is stopped and the
+reports are written (--no-trace only applies the bound, for py-spy runs):
+
+    trace_rank{R}.json          chrome trace (CPU + CUDA activity)
+    memory_rank{R}.json.gz      memory timeline (when supported by this torch)
+    top_ops_rank{R}.txt         key_averages() table
+    top_ops_rank{R}.json        condensed report, input to profiling/diff_profiles.py
+"""
+import argparse
+import contextlib
+import json
+import os
+import runpy
+import sys
+import time
+
+import torch
+from torch.profiler import ProfilerActivity, profile, schedule
+
+TOP_OPS = 100
+
+
+class _StopProfiling(BaseException):
+    # BaseException, like KeyboardInterrupt: an `except Exception` in the target's loop must not swallow it
+    pass
+
+
+def _split_argv(argv):
+    if "--" not in argv:
+        raise SystemExit("usage: torch_profile.py [options] -- (-m module | script.py) [args...]")
+    i = argv.index("--")
+    return argv[:i], argv[i + 1:]
+
+
+def _stat(evt, *names):
+    for name in names:
+        val = getattr(evt, name, None)
+        if val is not None:
+            return val
+    return 0
+
+
+def condensed_ops(prof, limit=TOP_OPS):
+    """
+    Top ops by self time (device first, then CPU) as plain dicts.
+    """
+    rows = []
+    for evt in prof.key_averages():
+        rows.append({
+            "name": evt.key,
+            "calls": evt.count,
+            "self_cpu_us": _stat(evt, "self_cpu_time_total"),
+            "cpu_total_us": _stat(evt, "cpu_time_total"),
+            "self_device_us": _stat(evt, "self_device_time_total", "self_cuda_time_total"),
+            "device_total_us": _stat(evt, "device_time_total", "cuda_time_total"),
+            "self_device_mem_bytes": _stat(evt, "self_device_memory_usage", "self_cuda_memory_usage"),
+        })
+    rows.sort(key=lambda r: (r["self_device_us"], r["self_cpu_us"]), reverse=True)
+    return rows[:limit]
+
+
+def write_reports(prof, out_dir, rank, meta):
+    os.makedirs(out_dir, exist_ok=True)
+    prof.export_chrome_trace(os.path.join(out_dir, f"trace_rank{rank}.json"))
+
+    if torch.cuda.is_available() and hasattr(prof, "export_memory_timeline"):
+        device = f"cuda:{torch.cuda.current_device()}"
+        try:
+            prof.export_memory_timeline(os.path.join(out_dir, f"memory_rank{rank}.json.gz"), device=device)
+        except Exception as exc:  # older torch / missing stacks: keep the other reports
+            print(f"[profile] memory timeline skipped: {exc}", flush=True)
+
+    sort_by = "self_cuda_time_total" if torch.cuda.is_available() else "self_cpu_time_total"
+    with open(os.path.join(out_dir, f"top_ops_rank{rank}.txt"), "w") as f:
+        f.write(prof.key_averages().table(sort_by=sort_by, row_limit=50))
+
+    report = dict(meta, rank=rank, ops=condensed_ops(prof))
+    with open(os.path.join(out_dir, f"top_ops_rank{rank}.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[profile] wrote reports for rank {rank} to {out_dir}", flush=True)
+
+
+def install_step_hook(callback):
+    """
+    Call `callback()` after every batch fetched from a DataLoader in this process.
+    """
+    from torch.utils.data import dataloader
+
+    orig_next = dataloader._BaseDataLoaderIter.__next__
+
+    def __next__(self):
+        batch = orig_next(self)
+        callback()
+        return batch
+
+    dataloader._BaseDataLoaderIter.__next__ = __next__
+
+
+def run_target(target):
+    if target[0] == "-m":
+        sys.argv = target[1:]
+        runpy.run_module(target[1], run_name="__main__", alter_sys=True)
+    else:
+        sys.argv = target
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target[0])))
+        runpy.run_path(target[0], run_name="__main__")
+
+
+def main():
+    own, target = _split_argv(sys.argv[1:])
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--steps", type=int, default=50, help="active steps to record")
+    parser.add_argument("--wait", type=int, default=5, help="steps skipped before warmup")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--no-trace", action="store_true", help="stop after the step bound, record nothing")
+    args = parser.parse_args(own)
+    if not target:
+        parser.error("missing target after '--'")
+
+    rank = int(os.environ.get("RANK", "0"))
+    meta = {
+        "target": " ".join(target),
+        "pod": os.environ.get("POD_NAME", ""),
+        "steps": args.steps,
+        "torch": torch.__version__,
+    }
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+
+    total_steps = args.wait + args.warmup + args.steps
+    seen = {"steps": 0}
+
+    start = time.time()
+
+    def on_trace_ready(p):
+        meta["wall_s"] = round(time.time() - start, 3)
+        write_reports(p, args.out_dir, rank, meta)
+
+    prof = None
+    if not args.no_trace:
+        prof = profile(
+            activities=activities,
+            schedule=schedule(wait=args.wait, warmup=args.warmup, active=args.steps, repeat=1),
+            on_trace_ready=on_trace_ready,
+            record_shapes=True,
+            profile_memory=True,
+            with_stack=True,
+        )
+
+    def on_step():
+        if prof is not None:
+            prof.step()
+        seen["steps"] += 1
+        if seen["steps"] >= total_steps:
+            raise _StopProfiling()
+
+    install_step_hook(on_step)
+
+    exit_code = 0
+    with prof if prof is not None else contextlib.nullcontext():
+        try:
+            run_target(target)
+        except _StopProfiling:
+            print(f"[profile] stopping target after {seen['steps']} steps", flush=True)
+        except SystemExit as exc:
+            # same convention as the interpreter: None is success, a message is printed and fails
+            if exc.code is None or isinstance(exc.code, int):
+                exit_code = exc.code or 0
+            else:
+                print(exc.code, file=sys.stderr, flush=True)
+                exit_code = 1
+    if seen["steps"] < total_steps:
+        print(f"[profile] target finished after only {seen['steps']} of {total_steps} steps", flush=True)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
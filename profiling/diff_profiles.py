@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Diff two condensed profiling reports (top_ops_rank*.json written by
+job_tools/torch_profile.py) to attribute a regression to specific ops.
+
+    python diff_profiles.py BASE NEW [--metric self_device_us] [--top 30]
+
+BASE / NEW can be a single top_ops_rank*.json or a directory holding one per
+rank; ranks are summed. Times are normalised per recorded step so runs with a
+different --steps still compare.
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICS = ["self_device_us", "self_cpu_us", "device_total_us", "cpu_total_us", "self_device_mem_bytes"]
+
+
+def load_report(path: Path):
+    files = sorted(path.glob("top_ops_rank*.json")) if path.is_dir() else [path]
+    if not files:
+        raise SystemExit(f"No top_ops_rank*.json under {path}")
+
+    ops = {}
+    steps = None
+    for f in files:
+        with open(f, "r") as fh:
+            report = json.load(fh)
+        steps = report.get("steps") or steps
+        for op in report["ops"]:
+            acc = ops.setdefault(op["name"], {m: 0 for m in METRICS + ["calls"]})
+            for m in METRICS + ["calls"]:
+                acc[m] += op.get(m, 0)
+
+    scale = 1.0 / steps if steps else 1.0
+    for acc in ops.values():
+        for m in METRICS + ["calls"]:
+            acc[m] *= scale
+    return ops
+
+
+def diff_rows(base, new, metric):
+    rows = []
+    for name in set(base) | set(new):
+        b = base.get(name, {}).get(metric, 0.0)
+        n = new.get(name, {}).get(metric, 0.0)
+        rows.append({
+            "op": name,
+            "base": b,
+            "new": n,
+            "delta": n - b,
+            "ratio": (n / b) if b else float("inf") if n else 1.0,
+        })
+    rows.sort(key=lambda r: abs(r["delta"]), reverse=True)
+    return rows
+
+
+def print_table(rows, metric, top):
+    total_b = sum(r["base"] for r in rows)
+    total_n = sum(r["new"] for r in rows)
+    print(f"{metric} per step: base={total_b:.1f} new={total_n:.1f} delta={total_n - total_b:+.1f}")
+    rows = rows[:top]
+    if not rows:
+        return
+    cols = ["op", "base", "new", "delta", "ratio"]
+    fmt = {
+        "op": lambda v: v if len(v) <= 60 else v[:57] + "...",
+        "base": lambda v: f"{v:.1f}",
+        "new": lambda v: f"{v:.1f}",
+        "delta": lambda v: f"{v:+.1f}",
+        "ratio": lambda v: f"{v:.2f}x",
+    }
+    cells = [{c: fmt[c](r[c]) for c in cols} for r in rows]
+    col_widths = {c: max(len(c), max(len(r[c]) for r in cells)) for c in cols}
+    print(" | ".join(f"{c:{col_widths[c]}}" for c in cols))
+    print("-+-".join("-" * col_widths[c] for c in cols))
+    for r in cells:
+        print(" | ".join(f"{r[c]:{col_widths[c]}}" for c in cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--metric", choices=METRICS, default="self_device_us")
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    rows = diff_rows(load_report(args.base), load_report(args.new), args.metric)
+    print_table(rows, args.metric, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import textwrap
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "job_tools"))
+from jobgen import timing_fields  # noqa: E402
+from retention import kubectl_jobs, referenced_paths  # noqa: E402
+
+IMAGE = "gitlab-registry.nrp-nautilus.io/jmduarte/hbb_interaction_network:latest"
+JOB_TOOLS_CM = "jjepa-job-tools"   # built by job_tools/gen_job_tools_configmap.py
+
+BASE = "/j-jepa-vol/J-JEPA-Alan"
+REPORT_DIR = f"{BASE}/retention/reports"
+MIN_AGE_HOURS = 24
+
+
+def emit_retention_job_yaml(apply: bool, protected: List[str]) -> str:
+    """
+    Build the retention / compaction Job (job_tools/retention.py). The pod
+    cannot list Jobs, so paths used by unfinished Jobs are baked in as
+    --protect at generation time; cells changed within MIN_AGE_HOURS are
+    skipped as well.
+    """
+    job_name = "alan-jjepa-retention" if apply else "alan-jjepa-retention-dry-run"
+    apply_line = "            --apply \\\n" if apply else ""
+    protect_lines = "".join(f"            --protect '{p}' \\\n" for p in sorted(protected))
+
+    _, _, runner_pre = timing_fields("retention", job_name)
+    runner_pre = textwrap.indent(runner_pre, " " * 10)
+
+    yaml = f"""apiVersion: batch/v1
+kind: Job
+metadata:
+  name: {job_name}
+  namespace: cms-ml
+  labels: {{ jobgroup: jjepa-job }}
+spec:
+  completions: 1
+  parallelism: 1
+  backoffLimit: 0
+  template:
+    spec:
+      restartPolicy: Never
+      containers:
+      - name: runner
+        image: {IMAGE}
+        env:
+        - name: POD_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
+        command: ["/bin/bash","-lc"]
+        args:
+        - |
+          set -euo pipefail
+{runner_pre}          phase retention python -u /job-tools/retention.py \\
+            --base {BASE} \\
+{apply_line}{protect_lines}            --min-age-hours {MIN_AGE_HOURS} \\
+            --report {REPORT_DIR}/retention_$(date -u +%Y%m%dT%H%M%S).json
+        resources:
+          requests: {{ cpu: "1", memory: 4Gi, ephemeral-storage: "1Gi" }}
+          limits:   {{ cpu: "1", memory: 4Gi, ephemeral-storage: "4Gi" }}
+        volumeMounts:
+        - {{ name: j-jepa-vol, mountPath: /j-jepa-vol }}
+        - {{ name: job-tools,  mountPath: /job-tools, readOnly: true }}
+      volumes:
+      - {{ name: j-jepa-vol, persistentVolumeClaim: {{ claimName: j-jepa-vol }} }}
+      - {{ name: job-tools, configMap: {{ name: {JOB_TOOLS_CM} }} }}
+"""
+    return yaml
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the checkpoint retention / compaction Job YAML.")
+    parser.add_argument("--apply", action="store_true",
+                        help="the job deletes / packs files (default: it only reports what it would do)")
+    parser.add_argument("--from-cluster", action="store_true",
+                        help="protect every /j-jepa-vol path used by an unfinished Job in cms-ml (needs kubectl)")
+    parser.add_argument("--protect", action="append", default=[], help="extra path to leave untouched")
+    args = parser.parse_args()
+
+    protected = set(args.protect)
+    if args.from_cluster:
+        protected |= referenced_paths(kubectl_jobs("cms-ml"))
+    if args.apply:
+        print("warning: --apply writes a Job that deletes checkpoints; run the dry-run Job first and check its report")
+        if not args.from_cluster:
+            print("warning: no --from-cluster; only --protect paths and the age guard keep pending jobs safe")
+
+    out_dir = Path(".")
+    fname = out_dir / f"alan-jjepa-retention{'' if args.apply else '-dry-run'}.yaml"
+    fname.write_text(emit_retention_job_yaml(args.apply, sorted(protected)))
+
+    print("Wrote files:")
+    print("  -", fname)
+    for p in sorted(protected):
+        print("      protected:", p)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+PriorityClasses for jobs generated with --priority.
+
+PriorityClass is cluster-scoped, so creating these needs cluster-admin rights
+(namespace-level edit in cms-ml is not enough). Until they exist, every pod
+of a --priority Job is rejected at admission because its priorityClassName is
+unknown: the Job stays without pods and records FailedCreate events.
+"""
+from pathlib import Path
+
+# must match PRIORITY_TIERS / PRIORITY_LAST in job_tools/jobgen.py
+PRIORITY_CLASSES = [
+    # name, value, description
+    ("jjepa-quick",  400, "J-JEPA jobs expected to finish within ~30 weighted minutes"),
+    ("jjepa-short",  300, "J-JEPA jobs expected to finish within ~4 weighted hours"),
+    ("jjepa-medium", 200, "J-JEPA jobs expected to finish within ~1 weighted day"),
+    ("jjepa-long",   100, "J-JEPA jobs expected to run longer than a day"),
+]
+
+
+def emit_priority_class_yaml(name: str, value: int, description: str) -> str:
+    """
+    Build one PriorityClass. preemptionPolicy: Never only reorders the pending
+    queue; it never evicts running pods (ours or anyone else's).
+    """
+    yaml = f"""apiVersion: scheduling.k8s.io/v1
+kind: PriorityClass
+metadata:
+  name: {name}
+  labels: {{ jobgroup: jjepa-job }}
+value: {value}
+globalDefault: false
+preemptionPolicy: Never
+description: "{description}"
+"""
+    return yaml
+
+
+def main():
+    fname = Path(".") / "jjepa-priority-classes.yaml"
+    fname.write_text("---\n".join(emit_priority_class_yaml(*pc) for pc in PRIORITY_CLASSES))
+
+    print("Wrote files:")
+    print("  -", fname)
+    print("PriorityClasses are cluster-scoped: applying them needs a cluster admin. Until they exist,")
+    print("Jobs generated with --priority are rejected (pods with an unknown priorityClassName are not created).")
+
+
+if __name__ == "__main__":
+    main()
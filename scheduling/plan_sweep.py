@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Order a sweep of generated Jobs shortest-expected-job-first.
+
+    python plan_sweep.py training/ finetune_cls/ finetune_flatten/ test_condensed_cls/ ... [--out submit_sweep.sh]
+
+Reads the jjepa/* annotations the generators add with --priority, estimates
+when each job could start (its dependencies' predicted finish, assuming free
+capacity) and sorts by (earliest start, weighted score). The generated script
+applies the jobs in that order and, before each job with dependencies, waits
+until those have completed, so early results are not stuck behind long runs.
+Jobs whose dependencies failed are skipped; everything else still runs.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+
+NAMESPACE = "cms-ml"
+
+
+def load_jobs(paths):
+    jobs = {}
+    for root in paths:
+        files = sorted(root.rglob("*.yaml")) if root.is_dir() else [root]
+        for f in files:
+            for doc in yaml.safe_load_all(f.read_text()):
+                if not doc or doc.get("kind") != "Job":
+                    continue
+                meta = doc["metadata"]
+                ann = meta.get("annotations") or {}
+                name = meta["name"]
+                if name in jobs:
+                    print(f"warning: {name} defined in {jobs[name]['file']} and {f}; keeping the first", file=sys.stderr)
+                    continue
+                jobs[name] = {
+                    "name": name,
+                    "file": f,
+                    "stage": ann.get("jjepa/stage", "-"),
+                    "minutes": float(ann.get("jjepa/predicted-minutes", "nan")),
+                    "score": float(ann.get("jjepa/priority-score", "inf")),
+                    "depends_on": [d for d in ann.get("jjepa/depends-on", "").split(",") if d],
+                    "provides": [p for p in ann.get("jjepa/provides", "").split(",") if p],
+                    "pclass": doc["spec"]["template"]["spec"].get("priorityClassName", "-"),
+                }
+    # combined jobs stand in for the per-head jobs they list in jjepa/provides
+    aliases = {p: name for name, job in jobs.items() for p in job["provides"] if p not in jobs}
+    for job in jobs.values():
+        deps = [aliases.get(d, d) for d in job["depends_on"]]
+        job["depends_on"] = [d for i, d in enumerate(deps) if d not in deps[:i]]
+    return jobs
+
+
+def plan(jobs):
+    """
+    Earliest start/finish per job with unlimited capacity, then the submission
+    order. Dependencies outside the sweep are assumed to be done already.
+    """
+    finish = {}
+
+    def earliest_finish(name, stack=()):
+        if name in finish:
+            return finish[name]
+        if name in stack:
+            raise SystemExit(f"dependency cycle: {' -> '.join(stack + (name,))}")
+        job = jobs[name]
+        start = max((earliest_finish(d, stack + (name,)) for d in job["depends_on"] if d in jobs), default=0.0)
+        job["start"] = start
+        minutes = job["minutes"] if job["minutes"] == job["minutes"] else 0.0
+        finish[name] = start + minutes
+        return finish[name]
+
+    for name in jobs:
+        earliest_finish(name)
+    return sorted(jobs.values(), key=lambda j: (j["start"], j["score"], j["name"]))
+
+
+def emit_submit_script(order):
+    """
+    Bash script that applies the jobs in order. A job is applied once all of
+    its in-sweep dependencies have completed; if one failed (or was skipped
+    itself), the job is skipped and the rest of the sweep goes on. A
+    dependency kubectl reports as NotFound is taken as already run; other
+    kubectl errors are retried.
+    """
+    lines = [
+        "#!/usr/bin/env bash",
+        "# generated by scheduling/plan_sweep.py",
+        "set -uo pipefail",
+        "",
+        "declare -A state   # job -> applied / done / failed / skipped",
+        "",
+        "job_state() {",
+        "  local out",
+        "  while true; do",
+        f"    if out=$(kubectl -n {NAMESPACE} get job \"$1\" -o jsonpath='{{range .status.conditions[?(@.status==\"True\")]}}{{.type}} {{end}}' 2>&1); then",
+        "      case \"$out\" in",
+        "        *Complete*) echo done; return ;;",
+        "        *Failed*) echo failed; return ;;",
+        "      esac",
+        "    elif [[ \"$out\" == *NotFound* || \"$out\" == *\"not found\"* ]]; then",
+        "      echo \"[plan] $1 not found, assuming it already ran\" >&2",
+        "      echo done; return",
+        "    else",
+        "      echo \"[plan] kubectl get job $1 failed, retrying: $out\" >&2",
+        "    fi",
+        "    sleep 60",
+        "  done",
+        "}",
+        "",
+        "submit() {   # submit FILE JOB [DEPENDENCY...]",
+        "  local file=$1 name=$2 dep",
+        "  shift 2",
+        "  for dep in \"$@\"; do",
+        "    case \"${state[$dep]:-applied}\" in",
+        "      applied) state[$dep]=$(job_state \"$dep\") ;;",
+        "    esac",
+        "    if [[ \"${state[$dep]}\" != done ]]; then",
+        "      echo \"[plan] skipping $name: $dep ${state[$dep]}\"",
+        "      state[$name]=skipped",
+        "      return",
+        "    fi",
+        "  done",
+        "  if kubectl apply -f \"$file\"; then",
+        "    state[$name]=applied",
+        "  else",
+        "    echo \"[plan] kubectl apply -f $file failed\"",
+        "    state[$name]=failed",
+        "  fi",
+        "}",
+        "",
+    ]
+    in_plan = {j["name"] for j in order}
+    for j in order:
+        deps = "".join(f" {d}" for d in j["depends_on"] if d in in_plan)
+        lines.append(f"submit {j['file']} {j['name']}{deps}   # {j['stage']}, ~{j['minutes']:.0f} min, {j['pclass']}")
+    lines += [
+        "",
+        "bad=0",
+        "for name in \"${!state[@]}\"; do",
+        "  case \"${state[$name]}\" in",
+        "    failed|skipped) echo \"[plan] $name: ${state[$name]}\"; bad=1 ;;",
+        "  esac",
+        "done",
+        "exit $bad",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def print_table(order):
+    cols = ["#", "job", "stage", "class", "minutes", "score", "start_h", "depends_on"]
+    rows = [{
+        "#": str(i),
+        "job": j["name"],
+        "stage": j["stage"],
+        "class": j["pclass"],
+        "minutes": f"{j['minutes']:.0f}",
+        "score": f"{j['score']:.1f}",
+        "start_h": f"{j['start'] / 60:.1f}",
+        "depends_on": (",".join(j["depends_on"]) or "-") if len(j["depends_on"]) <= 2
+                      else f"{len(j['depends_on'])} jobs",
+    } for i, j in enumerate(order)]
+    col_widths = {c: max(len(c), max(len(r[c]) for r in rows)) for c in cols}
+    print(" | ".join(f"{c:{col_widths[c]}}" for c in cols))
+    print("-+-".join("-" * col_widths[c] for c in cols))
+    for r in rows:
+        print(" | ".join(f"{r[c]:{col_widths[c]}}" for c in cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="generated Job YAMLs or directories holding them")
+    parser.add_argument("--out", type=Path, default=Path("submit_sweep.sh"))
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.paths)
+    if not jobs:
+        raise SystemExit("No Job YAMLs found.")
+    order = plan(jobs)
+    args.out.write_text(emit_submit_script(order))
+    args.out.chmod(0o755)
+
+    print_table(order)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
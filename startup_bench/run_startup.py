@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Run the startup path of a generated Job locally and report where the time goes.
+
+    python run_startup.py ../finetune_cls/alan-ptcl-1k-jets-finetune-5p.yaml [more.yaml ...]
+        [--latency "pip install -e=40" ...] [--latencies lat.json]
+        [--real git,pip] [--git-mirror https://github.com/alanx1234/J-JEPA.git=/path/to/mirror]
+        [--repeat 3] [--max-startup 120] [--out report.json]
+
+The initContainer and container scripts are extracted from the Job and run in
+a throw-away sandbox: /opt/repo, /j-jepa-vol, /config, /dev/shm and /scratch
+are redirected into it and /job-tools points at this repo's job_tools/. The
+dataset, output and parent dirs the scripts name on the volume are created
+empty, and downward-API env vars get placeholder values. git,
+pip, torchrun, py-spy, chown, sleep and `python -m src.*` are replaced by stubs
+that record when they ran and sleep for a simulated latency. Commands listed in
+--real run the real binary instead (with --git-mirror rewriting clone URLs), so
+real local mirrors can be timed too. Any other python runs for real.
+
+Reported per job: a per-phase timeline, the time spent in the shell itself,
+time_to_first_step_s (pod start until the training / evaluation entry point
+starts) and whatever the job's own phase timer wrote under the timing root. --max-startup turns the latter into a regression gate (exit 1).
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+STUBBED = ["git", "pip", "pip3", "torchrun", "python", "python3", "py-spy", "chown", "sleep"]
+SANDBOX_PATHS = ["/opt/repo", "/j-jepa-vol", "/config", "/dev/shm", "/scratch"]
+ENTRY_PHASES = ("torchrun", "python -m src.")
+# dirs a Job expects to exist on the volume: *_DIR=..., --*-dataset-path, --out-dir, --parent-dir, cp -r sources
+DIR_REF = re.compile(r'(?:_DIR=|-dataset-path\s+|--out-dir\s+|--parent-dir\s+|cp\s+-r\s+)"?(/[^\s"\\;]+)')
+# downward API fields the generators use
+FIELD_REFS = {
+    "metadata.name": "startup-bench-0",
+    "spec.nodeName": "localhost",
+    "metadata.labels['batch.kubernetes.io/controller-uid']": "startup-bench-uid",
+}
+
+# simulated seconds per phase; the longest key that prefixes the phase name wins
+DEFAULT_LATENCIES = {
+    "git clone": 8.0,
+    "pip install -e": 15.0,
+    "pip install --upgrade": 10.0,
+    "pip install": 20.0,
+    "torchrun": 5.0,
+    "python -m src.": 5.0,
+    "chown": 0.0,
+    "sleep": 0.0,
+}
+
+STUB_SOURCE = r'''
+import json, os, sys, time
+
+cfg = json.load(open(os.environ["STARTUP_BENCH_CONFIG"]))
+name, args = sys.argv[1], sys.argv[2:]
+
+
+def phase_of():
+    if name in ("pip", "pip3") or (name.startswith("python") and args[:2] == ["-m", "pip"]):
+        rest = args[2:] if name.startswith("python") else args
+        for flag in ("-e", "--upgrade"):
+            if flag in rest:
+                return f"pip {rest[0]} {flag}"
+        return "pip " + " ".join(rest[:1])
+    if name == "git":
+        return "git " + " ".join(args[:1])
+    if name.startswith("python"):
+        for i, a in enumerate(args):
+            if a == "-m" and i + 1 < len(args) and args[i + 1].startswith("src."):
+                return "python -m " + args[i + 1]
+            if a.startswith("src/") and a.endswith(".py"):
+                return "python " + a
+        return None
+    return name
+
+
+def latency(phase):
+    best = None
+    for key, val in cfg["latencies"].items():
+        if phase.startswith(key) and (best is None or len(key) > len(best[0])):
+            best = (key, val)
+    return best[1] if best else 0.0
+
+
+def real(cmd, argv):
+    path = cfg["real_bin"].get(cmd)
+    if path is None:
+        sys.exit(f"[stub] no real {cmd} on PATH")
+    return [path] + argv
+
+
+def record(phase, start, rc):
+    with open(cfg["events"], "a") as f:
+        f.write(json.dumps({"phase": phase, "cmd": " ".join([name] + args)[:300],
+                            "start": start, "end": time.time(), "exit_code": rc}) + "\n")
+
+
+phase = phase_of()
+if name == "py-spy":
+    # drop the profiler, run what it wraps
+    inner = args[args.index("--") + 1:] if "--" in args else []
+    os.execvp(inner[0], inner) if inner else sys.exit(0)
+if phase is None:
+    os.execv(cfg["real_bin"]["python"], [cfg["real_bin"]["python"]] + args)
+
+start = time.time()
+rc = 0
+if name in cfg["real"] or phase.split()[0] in cfg["real"]:
+    argv = list(args)
+    if name == "git":
+        argv = [cfg["mirrors"].get(a, a) for a in argv]
+    import subprocess
+    rc = subprocess.call(real(name, argv))
+else:
+    time.sleep(latency(phase))
+    if name == "git" and args[:1] == ["clone"]:
+        target = [a for a in args[1:] if not a.startswith("-")][-1]
+        os.makedirs(os.path.join(target, ".git"), exist_ok=True)
+record(phase, start, rc)
+sys.exit(rc)
+'''
+
+
+def extract_scripts(job):
+    """
+    [(container name, init?, shell, script)] in the order the pod runs them.
+    """
+    pod = job["spec"]["template"]["spec"]
+    out = []
+    for init, containers in ((True, pod.get("initContainers", [])), (False, pod.get("containers", []))):
+        for c in containers:
+            cmd = (c.get("command") or []) + (c.get("args") or [])
+            if len(cmd) < 3 or not cmd[1].endswith("c"):
+                raise SystemExit(f"{c['name']}: expected [shell, -c, script], got {cmd[:2]}")
+            # -lc would source the login profile and reset PATH away from the stubs
+            out.append((c["name"], init, cmd[0], cmd[2]))
+    return out
+
+
+def sandbox_script(script, sandbox):
+    for p in SANDBOX_PATHS:
+        script = script.replace(p, f"{sandbox}{p}")
+    return script.replace("/job-tools", str(REPO_ROOT / "job_tools"))
+
+
+def referenced_dirs(scripts):
+    """
+    Volume dirs named in the scripts; pod-local /dev/shm starts empty, so it is left out.
+    """
+    found = set()
+    for _, _, _, script in scripts:
+        for path in DIR_REF.findall(script):
+            if "$" not in path and path.startswith(tuple(SANDBOX_PATHS)) and not path.startswith("/dev/shm"):
+                found.add(path)
+    return sorted(found)
+
+
+def setup_sandbox(sandbox, args, latencies):
+    stub_dir = sandbox / "stub-bin"
+    stub_dir.mkdir(parents=True)
+    for p in SANDBOX_PATHS:
+        (sandbox / p.lstrip("/")).mkdir(parents=True, exist_ok=True)
+    (stub_dir / "stub.py").write_text(STUB_SOURCE)
+    for name in STUBBED:
+        wrapper = stub_dir / name
+        wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{stub_dir / "stub.py"}" {name} "$@"\n')
+        wrapper.chmod(0o755)
+
+    real_bin = {name: shutil.which(name) for name in STUBBED}
+    real_bin["python"] = sys.executable
+    cfg = {
+        "events": str(sandbox / "events.jsonl"),
+        "latencies": latencies,
+        "real": sorted(args.real),
+        "real_bin": {k: v for k, v in real_bin.items() if v},
+        "mirrors": dict(m.split("=", 1) for m in args.git_mirror),
+    }
+    cfg_path = sandbox / "stub-config.json"
+    cfg_path.write_text(json.dumps(cfg))
+
+    env = dict(os.environ)
+    env.update({
+        "PATH": f"{stub_dir}:{env.get('PATH', '')}",
+        "HOME": str(sandbox),
+        "POD_NAME": "startup-bench-0",
+        "NODE_NAME": "localhost",
+        "STARTUP_BENCH_CONFIG": str(cfg_path),
+    })
+    return env
+
+
+def run_job(path, args, latencies):
+    job = next(d for d in yaml.safe_load_all(Path(path).read_text()) if d and d.get("kind") == "Job")
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as tmp:
+        sandbox = Path(tmp)
+        env = setup_sandbox(sandbox, args, latencies)
+        # the Job controller sets the index; literal env values come from the manifest
+        if job["spec"].get("completionMode") == "Indexed":
+            env["JOB_COMPLETION_INDEX"] = "0"
+        for c in job["spec"]["template"]["spec"]["containers"]:
+            env.update({e["name"]: str(e["value"]) for e in c.get("env", []) if "value" in e})
+            env.update({e["name"]: FIELD_REFS[e["valueFrom"]["fieldRef"]["fieldPath"]] for e in c.get("env", [])
+                        if "fieldRef" in e.get("valueFrom", {}) and e["valueFrom"]["fieldRef"]["fieldPath"] in FIELD_REFS})
+        scripts = extract_scripts(job)
+        for d in referenced_dirs(scripts):
+            (sandbox / d.lstrip("/")).mkdir(parents=True, exist_ok=True)
+        pod_start = time.time()
+        containers = []
+        for name, init, shell, script in scripts:
+            start = time.time()
+            proc = subprocess.run([shell, "-c", sandbox_script(script, sandbox)], env=env, cwd=sandbox,
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            containers.append({"name": name, "init": init, "start": start, "end": time.time(),
+                               "exit_code": proc.returncode, "output_tail": proc.stdout[-2000:]})
+            if proc.returncode != 0:
+                break
+        events_file = sandbox / "events.jsonl"
+        events = [json.loads(line) for line in events_file.read_text().splitlines()] if events_file.exists() else []
+        # what the job's own phase timer wrote (TIMING_ROOT in the generators)
+        phase_lines = [json.loads(line) for f in sorted(sandbox.glob("j-jepa-vol/**/timing/**/*.jsonl"))
+                       for line in f.read_text().splitlines() if line.strip()]
+
+    for e in events:
+        e["t0"] = round(e["start"] - pod_start, 3)
+        e["seconds"] = round(e["end"] - e["start"], 3)
+    first_step = next((e["t0"] for e in events if e["phase"].startswith(ENTRY_PHASES)), None)
+    phases = {}
+    for e in events:
+        phases[e["phase"]] = round(phases.get(e["phase"], 0.0) + e["seconds"], 3)
+    for c in containers:
+        wall = c["end"] - c["start"]
+        # union of the stubbed intervals, since phases can run concurrently
+        inside, covered_to = 0.0, c["start"]
+        for e in sorted((e for e in events if c["start"] <= e["start"] <= c["end"]), key=lambda e: e["start"]):
+            inside += max(0.0, e["end"] - max(e["start"], covered_to))
+            covered_to = max(covered_to, e["end"])
+        c["wall_s"] = round(wall, 3)
+        c["shell_overhead_s"] = round(wall - inside, 3)
+        c["start"] = round(c["start"] - pod_start, 3)
+        c["end"] = round(c["end"] - pod_start, 3)
+    return {
+        "job": job["metadata"]["name"],
+        "file": str(path),
+        "ok": all(c["exit_code"] == 0 for c in containers),
+        "time_to_first_step_s": first_step,
+        "total_s": round(max([c["end"] for c in containers], default=0.0), 3),
+        "phases": phases,
+        "containers": containers,
+        "events": events,
+        "job_phases": phase_lines,
+    }
+
+
+def print_result(res):
+    status = "ok" if res["ok"] else "FAILED"
+    print(f"== {res['job']} ({status})  first step at {res['time_to_first_step_s']}s, total {res['total_s']}s")
+    for c in res["containers"]:
+        kind = "init" if c["init"] else "main"
+        print(f"   [{kind}] {c['name']}: {c['start']:.2f}s -> {c['end']:.2f}s  (shell {c['shell_overhead_s']:.2f}s)")
+        if c["exit_code"] != 0:
+            print("      " + c["output_tail"].replace("\n", "\n      "))
+    for e in res["events"]:
+        print(f"      +{e['t0']:8.2f}s  {e['seconds']:7.2f}s  {e['phase']}")
+    if res["job_phases"]:
+        print("   job phase timer:")
+    for p in res["job_phases"]:
+        print(f"      {float(p['end']) - float(p['start']):7.2f}s  {p['phase']} (exit {p['exit_code']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", nargs="+", help="generated Job YAMLs")
+    parser.add_argument("--latency", action="append", default=[], help="PHASE=SECONDS override (prefix match)")
+    parser.add_argument("--latencies", default=None, help="JSON file of PHASE: SECONDS overrides")
+    parser.add_argument("--real", default="", help="comma-separated commands to run for real (git,pip,...)")
+    parser.add_argument("--git-mirror", action="append", default=[], help="URL=LOCAL_PATH for real git clones")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-startup", type=float, default=None, help="fail if time to first step exceeds this")
+    parser.add_argument("--out", default=None, help="write all results as JSON")
+    args = parser.parse_args()
+    args.real = {c for c in args.real.split(",") if c}
+
+    latencies = dict(DEFAULT_LATENCIES)
+    if args.latencies:
+        with open(args.latencies, "r") as f:
+            latencies.update(json.load(f))
+    for spec in args.latency:
+        key, _, val = spec.rpartition("=")
+        latencies[key] = float(val)
+
+    results = []
+    for path in args.jobs:
+        for _ in range(args.repeat):
+            res = run_job(path, args, latencies)
+            print_result(res)
+            results.append(res)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"latencies": latencies, "real": sorted(args.real), "results": results}, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    failed = [r for r in results if not r["ok"]]
+    slow = [r for r in results if args.max_startup is not None
+            and (r["time_to_first_step_s"] is None or r["time_to_first_step_s"] > args.max_startup)]
+    for r in slow:
+        print(f"startup regression: {r['job']} first step at {r['time_to_first_step_s']}s > {args.max_startup}s")
+    sys.exit(1 if failed or slow else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,130 @@
 #!/usr/bin/env python3
+import argparse
+import sys
+import textwrap
 from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "job_tools"))
+from jobgen import priority_fields, timing_fields  # noqa: E402
 
 IMAGE = "gitlab-registry.nrp-nautilus.io/jmduarte/hbb_interaction_network:latest"
 OPTION_FILE = "/config/ParT_B_amp_1p.json"
 TEST_DIR = "/j-jepa-vol/J-JEPA/data/top/test/"
 CONFIG_CM = "ptcl-options-amp-1p"
+JOB_TOOLS_CM = "jjepa-job-tools"   # built by job_tools/gen_job_tools_configmap.py
+PROFILE_STEPS = 50                 # DataLoader batches recorded per evaluation in profile variants
+EXPORT_DTYPE = "fp16"               # --export: precision of the traced eval graph (job_tools/export_eval.py)
+LOCAL_QUEUE = "jjepa-queue"        # --queue: Kueue LocalQueue from admission/gen_kueue_queues.py
+
+# Shortest-expected-job-first priorities (--priority): jobs are ranked by
+# predicted minutes / (1 + number of downstream jobs they unblock); tiers in job_tools/jobgen.py
+STARTUP_MIN = 5                    # clone + pip install before the first step
+TEST_MIN_PER_TRIAL = 3             # one test-set pass of one trial checkpoint
+TRIALS = 5
 
 # Parent of the size_key dirs used in training
 MODEL_BASE = "/j-jepa-vol/J-JEPA-Alan/model_performances_run2/flatten"
 
 SIZES = ["1k", "10k", "100k", "1m"]
+PRETRAIN_PCTS = ["1", "5", "10", "50", "100"]  # finetune/* dirs written by gen_finetune_flatten.py
 
 
-def emit_test_job_yaml(size_key: str) -> str:
+def emit_test_job_yaml(size_key: str, profile: Optional[str] = None, priority: bool = False,
+                       export: bool = False, queue: Optional[str] = None) -> str:
     """
     Build a single *test* Job YAML that, for this size_key, loops over:
       - baseline/
       - finetune/* (whatever percentages exist),
     and for each parent-dir, runs test_eval_ptcl with
-      --checkpoint-type best_acc and best_rej.
+      --checkpoint-type best_acc and best_rej, reusing the summary of an
+      already-evaluated checkpoint set with identical content (job_tools/ckpt_dedupe.py).
+    profile: None, or 'torch' / 'pyspy' / 'both' to run every evaluation in the
+      loop as a bounded profiling run under <MODEL_BASE>/profile/ (no summaries written)
+    priority: attach a PriorityClass and scheduling annotations
+    export: evaluate through a cached reduced-precision TorchScript graph of each
+      checkpoint, checked against eager (job_tools/export_eval.py)
+    queue: Kueue LocalQueue name; the Job is created suspended and admitted
+      only once its whole request (every pod) fits the queue's quota
     """
     job_name = f"alan-ptcl-flatten-{size_key}-jets-test-all"
     size_root = f"{MODEL_BASE}/{size_key}"
 
+    prof_setup = ""
+    eval_target = "-m src.evaluation.test_eval_ptcl"
+    export_dtype = EXPORT_DTYPE if export else "none"
+    if export:
+        eval_target = f"/job-tools/export_eval.py --dtype {EXPORT_DTYPE} -- {eval_target}"
+    launch = f"              phase eval python -u {eval_target} \\\n"
+    eval_args = [f"--option-file {OPTION_FILE}", f"--test-dataset-path {TEST_DIR}",
+                 "--batch-size 256 --sum 0 --flatten 1 --cls 0"]
+    eval_lines = "".join(f"                {a} \\\n" for a in eval_args)
+    # results are only reused for the same evaluation code, export dtype and options
+    eval_key = " ".join([eval_target] + eval_args)
+    dedupe_pre = f"""\
+              if phase dedupe-reuse python -u /job-tools/ckpt_dedupe.py reuse --parent-dir "$parent_dir" --checkpoint-type "$ckpt_type" \\
+                --digest-file /tmp/ckpt_digest --repo /opt/repo/J-JEPA --export {export_dtype} --eval-key '{eval_key}'; then
+                continue
+              fi
+"""
+    dedupe_post = f"""\
+              phase dedupe-record python -u /job-tools/ckpt_dedupe.py record --parent-dir "$parent_dir" --checkpoint-type "$ckpt_type" \\
+                --digest-file /tmp/ckpt_digest --repo /opt/repo/J-JEPA --export {export_dtype} --eval-key '{eval_key}'
+"""
+    security = ""
+    if profile is not None:
+        job_name = f"{job_name}-profile"
+        dedupe_pre = dedupe_post = ""
+        prof_setup = f'\n          PROF_ROOT="{MODEL_BASE}/profile/{size_key}"\n'
+        prof_dir = '"$PROF_ROOT/${parent_dir#$ROOT/}/$ckpt_type"'
+        no_trace = " --no-trace" if profile == "pyspy" else ""
+        prof_cmd = (
+            f"python -u /job-tools/torch_profile.py --out-dir {prof_dir} --steps {PROFILE_STEPS}{no_trace} -- \\\n"
+            f"                {eval_target} \\\n"
+        )
+        launch = f"              phase eval {prof_cmd}"
+        if profile in ("pyspy", "both"):
+            prof_setup += "          phase pip-install-pyspy pip install --no-cache-dir py-spy\n"
+            launch = (
+                f"              mkdir -p {prof_dir}\n"
+                "              phase eval py-spy record --subprocesses --idle --rate 100 --format speedscope \\\n"
+                f"                -o {prof_dir}/pyspy_$POD_NAME.speedscope.json -- \\\n"
+                f"              {prof_cmd}"
+            )
+            security = '        securityContext: { capabilities: { add: ["SYS_PTRACE"] } }\n'
+
+    annotations = ""
+    priority_class = ""
+    if priority:
+        # baseline + one finetune dir per pct, best_acc and best_rej each
+        n_evals = 2 * (1 + len(PRETRAIN_PCTS))
+        minutes = STARTUP_MIN + (10 if profile else n_evals * TEST_MIN_PER_TRIAL * TRIALS)
+        depends_on = [f"alan-ptcl-{size_key}-jets-flatten-baseline"] + [
+            f"alan-ptcl-{size_key}-jets-finetune-flatten-{pct}p" for pct in PRETRAIN_PCTS
+        ]
+        annotations, priority_class = priority_fields("test", minutes, 0, depends_on)
+
+    queue_label = ""
+    suspend = ""
+    if queue is not None:
+        queue_label = f", kueue.x-k8s.io/queue-name: {queue}"
+        suspend = "  suspend: true\n"
+
+    init_pre, init_post, runner_pre = (textwrap.indent(s, " " * 10) for s in timing_fields("test", job_name))
+
     yaml = f"""apiVersion: batch/v1
 kind: Job
 metadata:
   name: {job_name}
   namespace: cms-ml
-  labels: {{ jobgroup: jjepa-job }}
-spec:
-  completions: 1
+  labels: {{ jobgroup: jjepa-job{queue_label} }}
+{annotations}spec:
+{suspend}  completions: 1
   parallelism: 1
   backoffLimit: 5
   template:
     spec:
-      restartPolicy: Never
+{priority_class}      restartPolicy: Never
       tolerations:
         - key: "nautilus.io/hardware"
           operator: "Equal"
@@ -55,12 +144,17 @@ spec:
       initContainers:
       - name: init-clone-repo
         image: alpine/git
+        env:
+        - name: POD_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
         command: ["/bin/sh","-c"]
         args:
         - |
-          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA &&
-          chown -R 1000:1000 /opt/repo
-        resources:
+{init_pre}          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA &&
+          chown -R 1000:1000 /opt/repo || rc=$?
+{init_post}        resources:
           requests: {{ cpu: "1", memory: 1Gi, ephemeral-storage: "1Gi" }}
           limits:   {{ cpu: "1", memory: 1Gi,  ephemeral-storage: "4Gi" }}
         volumeMounts:
@@ -73,14 +167,16 @@ spec:
         - {{ name: TORCH_CUDA_ALLOC_CONF, value: "max_split_size_mb:128" }}
         - name: POD_NAME
           valueFrom: {{ fieldRef: {{ fieldPath: metadata.name }} }}
+        - name: NODE_NAME
+          valueFrom: {{ fieldRef: {{ fieldPath: spec.nodeName }} }}
         command: ["/bin/bash","-lc"]
         args:
         - |
           set -euo pipefail
-          cd /opt/repo/J-JEPA/
-          pip install -e .
+{runner_pre}          cd /opt/repo/J-JEPA/
+          phase pip-install pip install -e .
 
-          ROOT="{size_root}"
+          ROOT="{size_root}"{prof_setup}
 
           # Loop over baseline and any finetune/* dirs that exist
           for parent_dir in "$ROOT/baseline" "$ROOT/finetune"/*; do
@@ -94,37 +190,48 @@ spec:
             echo "=========================================="
 
             for ckpt_type in best_acc best_rej; do
-              echo "Running test_eval_ptcl on $parent_dir with checkpoint-type=$ckpt_type"
-              python -u -m src.evaluation.test_eval_ptcl \\
-                --option-file {OPTION_FILE} \\
-                --test-dataset-path {TEST_DIR} \\
-                --batch-size 256 --sum 0 --flatten 1 --cls 0 \\
-                --parent-dir "$parent_dir" \\
+{dedupe_pre}              echo "Running test_eval_ptcl on $parent_dir with checkpoint-type=$ckpt_type"
+{launch}{eval_lines}                --parent-dir "$parent_dir" \\
                 --checkpoint-type "$ckpt_type"
-            done
+{dedupe_post}            done
           done
-        resources:
+{security}        resources:
           requests: {{ cpu: "2", memory: 64Gi, nvidia.com/gpu: 1, ephemeral-storage: "1Gi" }}
           limits:   {{ cpu: "2", memory: 64Gi, nvidia.com/gpu: 1, ephemeral-storage: "16Gi" }}
         volumeMounts:
         - {{ name: git-repo,   mountPath: /opt/repo }}
         - {{ name: j-jepa-vol, mountPath: /j-jepa-vol }}
         - {{ name: config,     mountPath: /config, readOnly: true }}
+        - {{ name: job-tools,  mountPath: /job-tools, readOnly: true }}
       volumes:
       - {{ name: git-repo, emptyDir: {{}} }}
       - {{ name: j-jepa-vol, persistentVolumeClaim: {{ claimName: j-jepa-vol }} }}
       - {{ name: config,   configMap: {{ name: {CONFIG_CM} }} }}
+      - {{ name: job-tools, configMap: {{ name: {JOB_TOOLS_CM} }} }}
 """
     return yaml
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate per-size test-all Job YAMLs.")
+    parser.add_argument("--profile", choices=["torch", "pyspy", "both"], default=None,
+                        help="write bounded profiling variants instead of the full evaluations")
+    parser.add_argument("--priority", action="store_true",
+                        help="attach PriorityClasses / annotations for scheduling/plan_sweep.py")
+    parser.add_argument("--queue", nargs="?", const=LOCAL_QUEUE, default=None,
+                        help=f"submit through a Kueue LocalQueue (default {LOCAL_QUEUE}): created suspended, "
+                             "admitted when the whole job fits the quota")
+    parser.add_argument("--export", action="store_true",
+                        help="evaluate through cached fp16 TorchScript exports checked against eager")
+    args = parser.parse_args()
+
     out_dir = Path(".")
     written = []
+    suffix = "-profile" if args.profile else ""
 
     for size_key in SIZES:
-        fname = out_dir / f"alan-ptcl-flatten-{size_key}-jets-test-all.yaml"
-        fname.write_text(emit_test_job_yaml(size_key))
+        fname = out_dir / f"alan-ptcl-flatten-{size_key}-jets-test-all{suffix}.yaml"
+        fname.write_text(emit_test_job_yaml(size_key, args.profile, args.priority, args.export, args.queue))
         written.append(str(fname))
 
     print("Wrote files:")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Per-phase timing distributions across a sweep.
+
+    python aggregate_timings.py /mnt/j-jepa-vol/J-JEPA-Alan/timing [--group-by stage|job|node]
+                                [--include-profile] [--json timings_summary.json]
+
+Every generated job appends one JSON line per phase (clone, pip-*, train, eval,
+dedupe-*, ...) to <timing root>/<stage>/<job>/<pod>.jsonl. This reads all of
+them (files or directories, searched recursively) and prints, per group and
+phase, the count, failures and p50/p90/max/total seconds. Two derived phases
+are added per pod: "startup" (clone start until the first train/eval phase
+starts) and "pod" (first start until last end). Profiling jobs are bounded runs
+and are left out unless --include-profile is given.
+"""
+import argparse
+import json
+import statistics
+from pathlib import Path
+
+WORK_PHASES = ("train", "eval")    # prefixes: train-cls / train-flatten in combined jobs
+
+
+def load_records(paths):
+    records = []
+    for root in paths:
+        files = sorted(root.rglob("*.jsonl")) if root.is_dir() else [root]
+        for f in files:
+            for n, line in enumerate(f.read_text().splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    # a pod killed mid-write leaves a partial last line
+                    print(f"warning: skipping malformed line {f}:{n}")
+                    continue
+                rec["start"] = float(rec["start"])
+                rec["end"] = float(rec["end"])
+                records.append(rec)
+    return records
+
+
+def is_profile(rec):
+    return "-profile" in rec.get("job", "")
+
+
+def derived_phases(records):
+    """
+    One "startup" and one "pod" record per pod (pods are unique per attempt).
+    """
+    by_pod = {}
+    for rec in records:
+        by_pod.setdefault((rec.get("job"), rec.get("pod")), []).append(rec)
+    out = []
+    for pod_recs in by_pod.values():
+        first = min(pod_recs, key=lambda r: r["start"])
+        base = {k: first.get(k) for k in ("stage", "job", "pod", "node")}
+        last_end = max(r["end"] for r in pod_recs)
+        failed = max((r["exit_code"] for r in pod_recs if r["phase"] != "dedupe-reuse"), default=0)
+        out.append(dict(base, phase="pod", start=first["start"], end=last_end, exit_code=failed))
+        work = [r["start"] for r in pod_recs if r["phase"].startswith(WORK_PHASES)]
+        if work:
+            out.append(dict(base, phase="startup", start=first["start"], end=min(work), exit_code=0))
+    return out
+
+
+def summarize(records, group_by):
+    groups = {}
+    for rec in records:
+        groups.setdefault((rec.get(group_by) or "-", rec["phase"]), []).append(rec)
+    rows = []
+    for (group, phase), recs in sorted(groups.items()):
+        secs = sorted(r["end"] - r["start"] for r in recs)
+
+        def pct(p):
+            return secs[min(len(secs) - 1, int(p * len(secs)))]
+
+        rows.append({
+            group_by: group,
+            "phase": phase,
+            "n": len(secs),
+            # dedupe-reuse exits 1 on a cache miss, which is not a failure
+            "failed": 0 if phase == "dedupe-reuse" else sum(1 for r in recs if r["exit_code"] != 0),
+            "p50_s": round(pct(0.50), 1),
+            "p90_s": round(pct(0.90), 1),
+            "max_s": round(secs[-1], 1),
+            "mean_s": round(statistics.fmean(secs), 1),
+            "total_h": round(sum(secs) / 3600, 2),
+        })
+    return rows
+
+
+def print_rows(rows, group_by):
+    if not rows:
+        print("No timing records found.")
+        return
+    cols = [group_by, "phase", "n", "failed", "p50_s", "p90_s", "max_s", "mean_s", "total_h"]
+    col_widths = {c: max(len(c), max(len(str(r[c])) for r in rows)) for c in cols}
+    print(" | ".join(f"{c:{col_widths[c]}}" for c in cols))
+    print("-+-".join("-" * col_widths[c] for c in cols))
+    for r in rows:
+        print(" | ".join(f"{str(r[c]):{col_widths[c]}}" for c in cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", type=Path, help="timing root, stage/job dirs or .jsonl files")
+    parser.add_argument("--group-by", choices=["stage", "job", "node"], default="stage")
+    parser.add_argument("--include-profile", action="store_true", help="keep *-profile jobs")
+    parser.add_argument("--json", default=None, help="also write the table as JSON")
+    args = parser.parse_args()
+
+    records = load_records(args.paths)
+    if not args.include_profile:
+        records = [r for r in records if not is_profile(r)]
+    rows = summarize(records + derived_phases(records), args.group_by)
+    print_rows(rows, args.group_by)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"group_by": args.group_by, "records": len(records), "rows": rows}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
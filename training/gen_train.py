@@ -1,5 +1,21 @@
 #!/usr/bin/env python3
+import argparse
+import sys
 import textwrap
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "job_tools"))
+from jobgen import priority_fields, timing_fields  # noqa: E402
+
+JOB_TOOLS_CM = "jjepa-job-tools"   # built by job_tools/gen_job_tools_configmap.py
+PROFILE_STEPS = 50                 # DataLoader batches recorded in profile variants
+LOCAL_QUEUE = "jjepa-queue"        # --queue: Kueue LocalQueue from admission/gen_kueue_queues.py
+
+# Shortest-expected-job-first priorities (--priority): jobs are ranked by
+# predicted minutes / (1 + number of downstream jobs they unblock); tiers in job_tools/jobgen.py
+STARTUP_MIN = 5                    # clone + pip install before the first step
+PRETRAIN_MIN_PER_MJET_GPU = 120    # rough pretraining cost, calibrate from timing data
+FINETUNE_JOBS_PER_PCT = 8          # 4 sizes x {cls, flatten} load each pretrained checkpoint
 
 def make_job_yaml(
     name_suffix,
@@ -9,12 +25,20 @@ def make_job_yaml(
     gpus,
     cpus,
     num_jets,
-    mem_gi
+    mem_gi,
+    profile=None,
+    priority=False,
+    queue=None
 ):
     """
     name_suffix: '1p', '5p', '10p', '50p', '100p'
     pct_str: '1%', '5%', '10%', '50%', '100%'
     use_full_train: True for 100% (no '100%' in data_path), False otherwise
+    profile: None, or 'torch' / 'pyspy' / 'both' for a bounded profiling run
+    priority: attach a PriorityClass and scheduling annotations
+    queue: Kueue LocalQueue name; the Job is created suspended and admitted
+      only once all of its GPUs fit the queue's quota, so a 2-GPU pod is never
+      overtaken by single-GPU pods taking one freed GPU at a time
     """
     job_name = f"alan-part-jjepa-{name_suffix}"
     config_map = f"ptcl-options-amp-{name_suffix}"
@@ -27,6 +51,67 @@ def make_job_yaml(
 
     output_dir = f"/j-jepa-vol/J-JEPA-Alan/models/JetClass/ptcl_filtered/{pct_str}"
 
+    # profiling variant: traces go to <output_dir>/profile, and the bounded run
+    # writes its checkpoints to profile/run so the real best_model.pth is untouched
+    prof_install = ""
+    prof_launch = ""
+    train_phase = "phase train "
+    prof_wrap = ""
+    prof_security = ""
+    prof_mount = ""
+    prof_volume = ""
+    if profile is not None:
+        job_name = f"{job_name}-profile"
+        prof_dir = f"{output_dir}/profile"
+        output_dir = f"{prof_dir}/run"
+        prof_mount = """\
+        - name: job-tools
+          mountPath: /job-tools
+          readOnly: true
+"""
+        prof_volume = f"""\
+      - name: job-tools
+        configMap:
+          name: {JOB_TOOLS_CM}
+"""
+        no_trace = " --no-trace" if profile == "pyspy" else ""
+        prof_wrap = f"""\
+              /job-tools/torch_profile.py --out-dir {prof_dir} --steps {PROFILE_STEPS}{no_trace} -- \\
+"""
+        if profile in ("pyspy", "both"):
+            prof_install = "            phase pip-install-pyspy pip install --no-cache-dir py-spy\n"
+            prof_launch = f"""\
+            mkdir -p {prof_dir}
+            phase train py-spy record --subprocesses --idle --rate 100 --format speedscope \\
+              -o {prof_dir}/pyspy_$POD_NAME.speedscope.json -- \\
+"""
+            train_phase = ""
+            prof_security = """\
+        securityContext:
+          capabilities:
+            add: ["SYS_PTRACE"]
+"""
+
+    annotations = ""
+    priority_class = ""
+    if priority:
+        if profile is None:
+            minutes = STARTUP_MIN + num_jets / 1e6 * PRETRAIN_MIN_PER_MJET_GPU / gpus
+            unblocks = FINETUNE_JOBS_PER_PCT
+        else:
+            minutes, unblocks = STARTUP_MIN + 10, 0
+        annotations, priority_class = priority_fields("pretrain", minutes, unblocks)
+
+    queue_label = ""
+    suspend = ""
+    if queue is not None:
+        queue_label = f"    kueue.x-k8s.io/queue-name: {queue}\n"
+        suspend = "  suspend: true\n"
+
+    init_pre, init_post, runner_pre = timing_fields("pretrain", job_name)
+    init_pre, init_post = (textwrap.indent(s, " " * 10) for s in (init_pre, init_post))
+    runner_pre = textwrap.indent(runner_pre, " " * 12)
+
     yaml = f"""\
 apiVersion: batch/v1
 kind: Job
@@ -34,12 +119,12 @@ metadata:
   namespace: cms-ml
   labels:
     jobgroup: jjepa-job
-  name: {job_name}
-spec:
-  backoffLimit: 0
+{queue_label}  name: {job_name}
+{annotations}spec:
+{suspend}  backoffLimit: 0
   template:
     spec:
-      tolerations:
+{priority_class}      tolerations:
       - key: "nautilus.io/hardware"
         operator: "Equal"
         value: "a100"
@@ -55,14 +140,23 @@ spec:
       initContainers:
       - name: init-clone-repo
         image: alpine/git
+        env:
+        - name: POD_NAME
+          valueFrom:
+            fieldRef:
+              fieldPath: metadata.name
+        - name: NODE_NAME
+          valueFrom:
+            fieldRef:
+              fieldPath: spec.nodeName
         command:
         - /bin/sh
         - -c
         args:
         - |
-          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA && \\
-          chown -R 1000:1000 /opt/repo/J-JEPA
-        volumeMounts:
+{init_pre}          git clone --single-branch --branch ptcl_alan https://github.com/alanx1234/J-JEPA.git /opt/repo/J-JEPA && \\
+          chown -R 1000:1000 /opt/repo/J-JEPA || rc=$?
+{init_post}        volumeMounts:
         - name: git-repo
           mountPath: /opt/repo
         resources:
@@ -80,17 +174,25 @@ spec:
           value: "expandable_segments:True,max_split_size_mb:128"
         - name: NVIDIA_DRIVER_CAPABILITIES
           value: "compute,utility"
+        - name: POD_NAME
+          valueFrom:
+            fieldRef:
+              fieldPath: metadata.name
+        - name: NODE_NAME
+          valueFrom:
+            fieldRef:
+              fieldPath: spec.nodeName
 
         command: ["/bin/bash", "-c"]
         args:
           - |
-            cd /opt/repo/J-JEPA
-            python -m pip install --upgrade pip wheel setuptools
-            pip install --no-cache-dir numpy tqdm h5py matplotlib awkward numba vector fastjet
-            pip install -e .
-
-            torchrun --standalone --nnodes=1 --nproc_per_node={nproc_per_node} \\
-              src/models/train_model_ptcl.py \\
+{runner_pre}            cd /opt/repo/J-JEPA
+            phase pip-upgrade python -m pip install --upgrade pip wheel setuptools
+            phase pip-deps pip install --no-cache-dir numpy tqdm h5py matplotlib awkward numba vector fastjet
+            phase pip-install pip install -e .
+{prof_install}
+{prof_launch}            {train_phase}torchrun --standalone --nnodes=1 --nproc_per_node={nproc_per_node} \\
+{prof_wrap}              src/models/train_model_ptcl.py \\
                 --config {config_json} \\
                 --num_jets {num_jets} \\
                 --data_path {data_path} \\
@@ -102,7 +204,7 @@ spec:
                 --probe_train_jets 50000 \\
                 --probe_val_jets 50000 \\
                 --probe_lr 1e-2
-        resources:
+{prof_security}        resources:
           limits:
             cpu: '{cpus}'
             memory: {mem_gi}Gi
@@ -121,7 +223,7 @@ spec:
           readOnly: true
         - name: dshm
           mountPath: /dev/shm
-        ports:
+{prof_mount}        ports:
         - containerPort: 6006
       volumes:
       - name: git-repo
@@ -136,12 +238,22 @@ spec:
         emptyDir:
           medium: Memory
           sizeLimit: 64Gi
-      restartPolicy: Never
+{prof_volume}      restartPolicy: Never
 """
     return textwrap.dedent(yaml)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate J-JEPA pretraining Job YAMLs.")
+    parser.add_argument("--profile", choices=["torch", "pyspy", "both"], default=None,
+                        help="write bounded profiling variants instead of the full runs")
+    parser.add_argument("--priority", action="store_true",
+                        help="attach PriorityClasses / annotations for scheduling/plan_sweep.py")
+    parser.add_argument("--queue", nargs="?", const=LOCAL_QUEUE, default=None,
+                        help=f"submit through a Kueue LocalQueue (default {LOCAL_QUEUE}): created suspended, "
+                             "admitted when the whole job fits the quota")
+    args = parser.parse_args()
+
     jobs = [
         # name_suffix, pct_str, use_full_train, nproc_per_node, gpus, cpus, num_jets, mem_gi
         # datasets: 1M, 5M, 10M, 50M, 100M; keep 20% → 0.2M, 1M, 2M, 10M, 20M
@@ -161,9 +273,12 @@ def main():
             gpus=gpus,
             cpus=cpus,
             num_jets=num_jets,
-            mem_gi = mem_gi
+            mem_gi = mem_gi,
+            profile=args.profile,
+            priority=args.priority,
+            queue=args.queue
         )
-        filename = f"alan-part-jjepa-{name_suffix}.yaml"
+        filename = f"alan-part-jjepa-{name_suffix}{'-profile' if args.profile else ''}.yaml"
         with open(filename, "w") as f:
             f.write(yaml_text)
         print(f"Wrote {filename}")